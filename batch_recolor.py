@@ -0,0 +1,126 @@
+import os
+import queue
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import color_core
+import perf_hooks
+from recolor_manifest import ManifestSet, params_key, source_state
+
+
+def recolor_task(image_path, save_path, *args, incremental=False, **kwargs):
+    try:
+        state = source_state(image_path) if incremental else None
+        result = color_core.recolor_file(image_path, save_path, *args, digest=state and state["digest"], **kwargs)
+        if state is not None:
+            result["source_state"] = state
+        return result
+    finally:
+        perf_hooks.dump()
+
+
+class BatchRecolor:
+    def __init__(self, tasks, target_color, intensity, sensitivity, source_color=None, workers=None, rules=(), use_lut=None, space="rgb",
+                 profile=color_core.DEFAULT_PROFILE, incremental=True, suffix=color_core.OUTPUT_SUFFIX):
+        self.tasks = list(tasks)
+        self.target_color = target_color
+        self.intensity = intensity
+        self.sensitivity = sensitivity
+        self.source_color = source_color
+        self.rules = list(rules)
+        self.space = space
+        self.profile = profile
+        self.manifests = ManifestSet(params_key(target_color, intensity, sensitivity, source_color, self.rules, space, profile, suffix)) if incremental else None
+        self.use_lut = use_lut if use_lut is not None else (
+            source_color is not None and color_core.lut_pays_off(image_path for image_path, _ in self.tasks))
+        self.workers = workers or os.cpu_count() or 1
+        self.events = queue.Queue()
+        self.futures = {}
+        self.executor = None
+        self.completed = 0
+        self.results = []
+        self.errors = []
+        self.skipped = []
+        self.cancelled = 0
+        self.started = None
+
+    @property
+    def total(self):
+        return len(self.tasks)
+
+    @property
+    def done(self):
+        return self.completed >= self.total
+
+    def start(self):
+        self.started = time.perf_counter()
+        pending = []
+        for image_path, save_path in self.tasks:
+            output = self.manifests.lookup(image_path, save_path) if self.manifests is not None else None
+            if output is not None:
+                self.skipped.append((image_path, output))
+                self.completed += 1
+            else:
+                pending.append((image_path, save_path))
+        if not pending:
+            if self.manifests is not None:
+                self.manifests.save()
+            return self
+        self.executor = ProcessPoolExecutor(max_workers=min(self.workers, len(pending)), mp_context=multiprocessing.get_context("spawn"))
+        for image_path, save_path in pending:
+            future = self.executor.submit(
+                recolor_task, image_path, save_path,
+                self.target_color, self.intensity, self.sensitivity, self.source_color, self.rules, self.use_lut,
+                space=self.space, profile=self.profile, incremental=self.manifests is not None,
+            )
+            self.futures[future] = image_path
+            future.add_done_callback(self.events.put)
+        self.executor.shutdown(wait=False)
+        return self
+
+    def poll(self):
+        finished = []
+        while True:
+            try:
+                future = self.events.get_nowait()
+            except queue.Empty:
+                break
+            image_path = self.futures[future]
+            self.completed += 1
+            if future.cancelled():
+                self.cancelled += 1
+                continue
+            error = future.exception()
+            if error is not None:
+                self.errors.append((image_path, str(error)))
+            else:
+                result = future.result()
+                self.results.append(result)
+                if self.manifests is not None:
+                    self.manifests.record(image_path, result)
+            finished.append(image_path)
+        if self.done and self.manifests is not None:
+            self.manifests.save()
+        return finished
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
+
+    def wait(self, interval=0.1, on_progress=None):
+        while not self.done:
+            time.sleep(interval)
+            if self.poll() and on_progress is not None:
+                on_progress(self)
+        return self
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            "total": self.total,
+            "saved": len(self.results),
+            "errors": len(self.errors),
+            "skipped": len(self.skipped),
+            "cancelled": self.cancelled,
+            "seconds": elapsed,
+        }
@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import color_core
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_SIZES = ["1000x1000", "4000x3000", "8000x6000"]
+COMPARE_MAX_PIXELS = 16_000_000
+PARAMS = ((255, 0, 0), 0.5, 0.3, (128, 128, 128))
+
+
+def legacy_apply_color_change(image, target_color, intensity, sensitivity, source_dominant_color):
+    img_array = np.array(image)
+    if len(img_array.shape) != 3 or img_array.shape[2] != 4:
+        return image
+    rgb_array = img_array[:, :, :3].astype(np.float32)
+    alpha_array = img_array[:, :, 3].astype(np.float32)
+    target_rgb = np.array(target_color, dtype=np.float32)
+    dominant = np.array(source_dominant_color, dtype=np.float32)
+    diff = rgb_array - dominant
+    dist = np.sqrt(np.sum(np.square(diff), axis=2))
+    thresh = sensitivity * 255.0
+    mask = (alpha_array > 0) & (dist < thresh)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = intensity * (1.0 - (dist / thresh))
+    factor = np.clip(factor, 0.0, 1.0)
+    factor3 = np.repeat(factor[:, :, np.newaxis], 3, axis=2)
+    blend = rgb_array * (1.0 - factor3) + target_rgb * factor3
+    rgb_array[mask] = blend[mask]
+    rgb_array = np.clip(rgb_array, 0, 255).astype(np.uint8)
+    result_array = np.dstack((rgb_array, alpha_array.astype(np.uint8)))
+    return Image.fromarray(result_array)
+
+
+KERNELS = {"legacy": legacy_apply_color_change, "chunked": color_core.apply_color_change}
+
+
+def synthetic_image(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    array = np.empty((height, width, 4), dtype=np.uint8)
+    for top in range(0, height, 64):
+        rows = min(64, height - top)
+        block = rng.normal(128, 60, size=(rows, width, 3))
+        array[top:top + rows, :, :3] = np.clip(block, 0, 255)
+        array[top:top + rows, :, 3] = np.where(rng.random((rows, width)) < 0.1, 0, 255)
+    return Image.fromarray(array)
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def make_rules(count, sensitivity=0.15, seed=0, first=None):
+    rng = np.random.default_rng(seed)
+    rules = [first] if first is not None else []
+    while len(rules) < count:
+        source = tuple(int(c) for c in rng.integers(0, 256, 3))
+        target = tuple(int(c) for c in rng.integers(0, 256, 3))
+        rules.append((source, target, 0.7, sensitivity))
+    return rules
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def max_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_child(kernel, size):
+    image = synthetic_image(*parse_size(size))
+    baseline = max_rss_mb()
+    started = time.perf_counter()
+    KERNELS[kernel](image, *PARAMS)
+    seconds = time.perf_counter() - started
+    peak = max_rss_mb()
+    print(json.dumps({"seconds": seconds, "baseline_rss_mb": baseline, "peak_rss_mb": peak}))
+
+
+def measure(kernel, size):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", kernel, size],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare_outputs(size):
+    image = synthetic_image(*parse_size(size), seed=1)
+    expected = np.asarray(legacy_apply_color_change(image, *PARAMS))
+    actual = np.asarray(color_core.apply_color_change(image, *PARAMS))
+    return int(np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark apply_color_change: legacy vs chunked kernel.")
+    parser.add_argument("sizes", nargs="*", default=DEFAULT_SIZES, help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--child", nargs=2, metavar=("KERNEL", "SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(*args.child)
+        return 0
+
+    results = []
+    for size in args.sizes:
+        width, height = parse_size(size)
+        max_diff = compare_outputs(size if width * height <= COMPARE_MAX_PIXELS else "4000x4000")
+        for kernel in KERNELS:
+            row = {"size": size, "kernel": kernel, "max_abs_diff": max_diff}
+            row.update(measure(kernel, size))
+            results.append(row)
+            rss = "n/a" if row["peak_rss_mb"] is None else f"{row['peak_rss_mb'] - row['baseline_rss_mb']:.0f} MB"
+            print(f"{size:>12} {kernel:>8}: {row['seconds']:.3f}s, peak RSS above input {rss}, max diff {max_diff}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import color_core
+from bench_apply_color_change import synthetic_image, parse_size, best_of
+
+DEFAULT_SIZES = ["1000x1000", "4000x3000", "8000x6000"]
+PARAMS = ((255, 0, 0), 0.5, 0.3, (30, 60, 200))
+CONVERTERS = {"lab": color_core.rgb_to_lab, "hsv": color_core.rgb_to_hsv}
+
+
+def convert_all(array, space, chunk_pixels=color_core.CHUNK_PIXELS):
+    pixels = array.reshape(-1, 4)
+    for start in range(0, len(pixels), chunk_pixels):
+        CONVERTERS[space](pixels[start:start + chunk_pixels, :3])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark RGB vs CIELAB vs HSV color matching.")
+    parser.add_argument("sizes", nargs="*", default=DEFAULT_SIZES, help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is reported (default: 3)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    color_core.color_to_lab.cache_clear()
+    started = time.perf_counter()
+    color_core.color_to_lab(PARAMS[3])
+    uncached = time.perf_counter() - started
+    started = time.perf_counter()
+    color_core.color_to_lab(PARAMS[3])
+    cached = time.perf_counter() - started
+    print(f"constant color conversion: {uncached * 1e6:.1f} us uncached, {cached * 1e6:.2f} us cached")
+
+    results = []
+    for size in args.sizes:
+        image = synthetic_image(*parse_size(size))
+        array = np.asarray(image)
+        rgb_seconds = None
+        for space in color_core.MATCH_SPACES:
+            seconds, result = best_of(lambda: color_core.apply_color_change(image, *PARAMS, space=space), args.repeat)
+            rgb_seconds = rgb_seconds or seconds
+            convert_seconds = best_of(lambda: convert_all(array, space), 1)[0] if space in CONVERTERS else 0.0
+            row = {
+                "size": size, "space": space, "seconds": seconds,
+                "relative_to_rgb": seconds / rgb_seconds,
+                "full_conversion_seconds": convert_seconds,
+                "changed_fraction": float((np.asarray(result) != array).any(axis=2).mean()),
+            }
+            results.append(row)
+            print(f"{size:>12} {space:>4}: {seconds:.3f}s ({row['relative_to_rgb']:.2f}x rgb), "
+                  f"full-frame conversion {convert_seconds:.3f}s, {row['changed_fraction'] * 100:.1f}% pixels changed")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import color_core
+from bench_apply_color_change import parse_size
+
+DEFAULT_SIZES = ["2000x1500", "4000x3000"]
+
+
+def photo_image(width, height, alpha, seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    array = np.empty((height, width, 4), dtype=np.uint8)
+    array[..., 0] = np.clip(128 + 100 * np.sin(x / 97.0) * np.cos(y / 131.0) + rng.normal(0, 6, (height, width)), 0, 255)
+    array[..., 1] = np.clip(255 * x / width + rng.normal(0, 6, (height, width)), 0, 255)
+    array[..., 2] = np.clip(255 * y / height + rng.normal(0, 6, (height, width)), 0, 255)
+    array[..., 3] = 255
+    if alpha:
+        array[: height // 4, : width // 4, 3] = 0
+    return Image.fromarray(array)
+
+
+def max_diff(image, path):
+    with Image.open(path) as saved:
+        decoded = np.asarray(saved.convert(image.mode))
+    return int(np.abs(decoded.astype(np.int16) - np.asarray(image).astype(np.int16)).max())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark output profiles: encode time and file size.")
+    parser.add_argument("sizes", nargs="*", default=DEFAULT_SIZES, help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--profiles", nargs="+", default=list(color_core.OUTPUT_PROFILES), help="Profiles to test (default: all)")
+    parser.add_argument("--files", type=int, default=8, help="Files encoded for the parallel throughput run (default: 8)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Parallel encoder threads (default: CPU count)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            for alpha in (False, True):
+                image = photo_image(*parse_size(size), alpha=alpha)
+                kind = "alpha" if alpha else "opaque"
+                for profile in args.profiles:
+                    base = os.path.join(folder, f"{size}_{kind}_{profile}")
+                    started = time.perf_counter()
+                    path = color_core.save_image(image, base + ".png", profile)
+                    seconds = time.perf_counter() - started
+
+                    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                        started = time.perf_counter()
+                        list(executor.map(lambda i: color_core.save_image(image, f"{base}_{i}.png", profile), range(args.files)))
+                        parallel = time.perf_counter() - started
+
+                    row = {
+                        "size": size, "image": kind, "profile": profile,
+                        "format": os.path.splitext(path)[1][1:], "seconds": seconds, "bytes": os.path.getsize(path),
+                        "parallel_files_per_second": args.files / parallel,
+                        "serial_files_per_second": 1 / seconds,
+                        "max_abs_diff": max_diff(image, path),
+                    }
+                    results.append(row)
+                    print(f"{size:>10} {kind:>6} {profile:>10} -> {row['format']:>4}: {seconds:.3f}s, {row['bytes'] / 1e6:6.2f} MB, "
+                          f"{row['parallel_files_per_second']:.1f} files/s on {args.workers} threads "
+                          f"({row['parallel_files_per_second'] * seconds:.1f}x), max diff {row['max_abs_diff']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
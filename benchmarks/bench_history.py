@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_history import EditHistory, frame_bytes
+from bench_apply_color_change import synthetic_image, parse_size
+
+DEFAULT_SIZES = ["1000x1000", "4000x3000"]
+TARGETS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (0, 255, 255)]
+
+
+class LegacyHistory:
+    def __init__(self, original):
+        self.history = [original.copy()]
+        self.index = 0
+
+    def __len__(self):
+        return len(self.history)
+
+    def record(self, op, image):
+        del self.history[self.index + 1:]
+        self.history.append(image.copy())
+        self.index += 1
+
+    def undo(self):
+        self.index -= 1
+        return self.history[self.index].copy()
+
+    def redo(self):
+        self.index += 1
+        return self.history[self.index].copy()
+
+    def memory_usage(self):
+        return sum(frame_bytes(image) for image in self.history)
+
+
+def recolor_edits(image, count):
+    from color_core import apply_color_change
+
+    for i in range(count):
+        params = (TARGETS[i % len(TARGETS)], 0.3 + 0.05 * (i % 8), 0.3, (128, 128, 128))
+        yield ("recolor",) + params, apply_color_change(image, *params)
+
+
+def brush_edits(image, count, seed=0):
+    rng = np.random.default_rng(seed)
+    array = np.array(image)
+    height, width = array.shape[:2]
+    for i in range(count):
+        top = int(rng.integers(0, max(1, height - 200)))
+        left = int(rng.integers(0, max(1, width - 200)))
+        array[top:top + 200, left:left + 200, :3] = TARGETS[i % len(TARGETS)]
+        yield None, Image.fromarray(array.copy())
+
+
+def run(history, edits):
+    for op, image in edits:
+        history.record(op, image)
+    timings = []
+    for step in ("undo", "redo"):
+        while True:
+            if step == "undo" and history.index == 0:
+                break
+            if step == "redo" and history.index == len(history) - 1:
+                break
+            started = time.perf_counter()
+            getattr(history, step)()
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark undo/redo history: full-frame copies vs operation/diff history.")
+    parser.add_argument("sizes", nargs="*", default=DEFAULT_SIZES, help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--edits", type=int, default=10, help="Number of edits to record (default: 10)")
+    parser.add_argument("--budget-mb", type=float, default=512, help="History memory budget in MB (default: 512)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        image = synthetic_image(*parse_size(size))
+        for workload in ("recolor", "brush"):
+            for store in ("legacy", "delta"):
+                edits = recolor_edits(image, args.edits) if workload == "recolor" else brush_edits(image, args.edits)
+                if store == "legacy":
+                    history = LegacyHistory(image)
+                else:
+                    history = EditHistory(image, memory_budget=int(args.budget_mb * 1024 * 1024))
+                timings = run(history, edits)
+                row = {
+                    "size": size, "workload": workload, "store": store, "edits": args.edits,
+                    "memory_mb": history.memory_usage() / (1024 * 1024),
+                    "first_undo_ms": timings[0] * 1000 if timings else 0.0,
+                    "undo_median_ms": statistics.median(timings) * 1000 if timings else 0.0,
+                    "undo_max_ms": max(timings) * 1000 if timings else 0.0,
+                }
+                results.append(row)
+                print(f"{size:>12} {workload:>8} {store:>7}: {row['memory_mb']:8.1f} MB retained, "
+                      f"first undo {row['first_undo_ms']:.1f} ms, undo/redo median {row['undo_median_ms']:.1f} ms, max {row['undo_max_ms']:.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import color_core
+from bench_apply_color_change import synthetic_image, parse_size, make_rules, best_of
+
+DEFAULT_SIZES = ["1000x1000", "4000x3000"]
+DEFAULT_RULE_COUNTS = [1, 3, 8]
+FIRST_RULE = ((128, 128, 128), (255, 0, 0), 0.5, 0.3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cached 3D LUT recolor path against the per-pixel float path.")
+    parser.add_argument("sizes", nargs="*", default=DEFAULT_SIZES, help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--rules", type=int, nargs="+", default=DEFAULT_RULE_COUNTS, help="Rule counts to test (default: 1 3 8)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is reported (default: 3)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as lut_dir:
+        for count in args.rules:
+            rules = make_rules(count, first=FIRST_RULE)
+            color_core._lut_cache.clear()
+            started = time.perf_counter()
+            color_core.load_lut(rules, lut_dir)
+            build_seconds = time.perf_counter() - started
+            color_core._lut_cache.clear()
+            started = time.perf_counter()
+            lut = color_core.load_lut(rules, lut_dir)
+            load_seconds = time.perf_counter() - started
+
+            for size in args.sizes:
+                array = np.array(synthetic_image(*parse_size(size)))
+                float_seconds, expected = best_of(lambda: color_core.recolor_rules(array.copy(), rules), args.repeat)
+                lut_seconds, actual = best_of(lambda: color_core.apply_lut_array(array.copy(), lut), args.repeat)
+                saved = float_seconds - lut_seconds
+                row = {
+                    "size": size, "rules": count,
+                    "build_seconds": build_seconds, "disk_load_seconds": load_seconds,
+                    "float_seconds": float_seconds, "lut_seconds": lut_seconds,
+                    "speedup": float_seconds / lut_seconds if lut_seconds else None,
+                    "break_even_images": build_seconds / saved if saved > 0 else None,
+                    "max_abs_diff": int(np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max()),
+                }
+                results.append(row)
+                break_even = f"{row['break_even_images']:.1f}" if row["break_even_images"] is not None else "never"
+                print(f"{size:>12} {count:>2} rules: float {float_seconds:.3f}s, lut {lut_seconds:.3f}s "
+                      f"({row['speedup']:.1f}x), build {build_seconds:.2f}s, disk load {load_seconds * 1000:.1f} ms, "
+                      f"break-even {break_even} images, max diff {row['max_abs_diff']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
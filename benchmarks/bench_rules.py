@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import color_core
+from bench_apply_color_change import parse_size, make_rules, best_of
+
+DEFAULT_SIZES = ["2000x1500"]
+DEFAULT_RULE_COUNTS = [1, 2, 4, 8, 16]
+DEFAULT_SENSITIVITY = 0.3
+
+
+def noise_image(width, height, seed=0):
+    array = np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+    array[..., 3] = 255
+    return array
+
+
+def separate_passes(array, rules):
+    for source, target, intensity, sensitivity in rules:
+        color_core.recolor_array(array, target, intensity, sensitivity, source)
+    return array
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the single-sweep multi-rule recolor against one pass per rule.")
+    parser.add_argument("sizes", nargs="*", default=DEFAULT_SIZES, help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--rules", type=int, nargs="+", default=DEFAULT_RULE_COUNTS, help="Rule counts to test (default: 1 2 4 8 16)")
+    parser.add_argument("--sensitivity", type=float, default=DEFAULT_SENSITIVITY, help="Sensitivity of every rule (default: 0.3)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is reported (default: 3)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        array = noise_image(*parse_size(size))
+        for count in args.rules:
+            rules = make_rules(count, args.sensitivity)
+            sweep_seconds, result = best_of(lambda: color_core.recolor_rules(array.copy(), rules), args.repeat)
+            passes_seconds, _ = best_of(lambda: separate_passes(array.copy(), rules), args.repeat)
+            row = {
+                "size": size, "rules": count, "sensitivity": args.sensitivity,
+                "sweep_seconds": sweep_seconds, "passes_seconds": passes_seconds,
+                "sweep_seconds_per_rule": sweep_seconds / count, "speedup": passes_seconds / sweep_seconds,
+                "changed": float((result != array).any(axis=2).mean()),
+            }
+            results.append(row)
+            print(f"{size:>12} {count:>3} rules: single sweep {sweep_seconds:.3f}s "
+                  f"({sweep_seconds / count * 1000:.1f} ms/rule), separate passes {passes_seconds:.3f}s "
+                  f"({row['speedup']:.2f}x), {row['changed'] * 100:.1f}% pixels changed")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
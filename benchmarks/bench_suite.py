@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import color_core
+import perf_hooks
+from bench_apply_color_change import synthetic_image, parse_size
+
+DEFAULT_IMAGE_SIZES = ["1000x1000", "4000x3000"]
+DEFAULT_WORKBOOKS = ["2000x10", "20000x10"]
+DEFAULT_THRESHOLD = 0.10
+PARAMS = ((255, 0, 0), 0.5, 0.3, (30, 60, 200))
+DISPLAY_SIZE = (1200, 800)
+UNIQUE_TEXT_RATIO = 0.3
+
+
+def peak_memory(func):
+    owned = not tracemalloc.is_tracing()
+    if owned:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if owned:
+            tracemalloc.stop()
+
+
+def measure(case, func, units, unit, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    if setup is not None:
+        setup()
+    seconds = min(timings)
+    row = {
+        "case": case, "seconds": seconds, "median_seconds": float(np.median(timings)),
+        "peak_mb": peak_memory(func) / 2 ** 20,
+        "throughput": units / seconds if seconds else None, "unit": f"{unit}/s",
+    }
+    print(f"{case:<48} {seconds:8.3f}s  peak {row['peak_mb']:8.1f} MB  {row['throughput']:14,.0f} {row['unit']}")
+    return row
+
+
+def skipped(case, reason):
+    print(f"{case:<48} skipped: {reason}")
+    return {"case": case, "skipped": reason}
+
+
+def image_cases(sizes, folder, repeat):
+    rows = []
+    for size in sizes:
+        image = synthetic_image(*parse_size(size))
+        pixels = image.width * image.height
+        rows.append(measure(f"image.apply_color_change[{size}]",
+                            lambda: color_core.apply_color_change(image, *PARAMS), pixels, "pixels", repeat))
+
+        path = os.path.join(folder, f"{size}.png")
+        image.save(path, compress_level=1)
+        rows.append(measure(f"image.get_dominant_color[{size}]",
+                            lambda: color_core.get_dominant_color(path), pixels, "pixels", repeat,
+                            setup=color_core._dominant_cache.clear))
+        rows.extend(display_cases(size, image, repeat))
+    return rows
+
+
+def display_cases(size, image, repeat):
+    cold, warm = f"image.display_image[{size}, cold]", f"image.display_image[{size}, warm]"
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+        return [skipped(cold, reason), skipped(warm, reason)]
+
+    from image_color_changer import ImageColorChanger
+
+    app = None
+    try:
+        root.geometry("x".join(map(str, DISPLAY_SIZE)))
+        app = ImageColorChanger(root)
+        app.original_image = app.modified_image = image
+        root.update()
+
+        def reset(clear_pyramid):
+            app.preview_key = None
+            if clear_pyramid:
+                app.preview_pyramids = {}
+
+        pixels = image.width * image.height
+        return [
+            measure(cold, app.display_image, pixels, "pixels", repeat, setup=lambda: reset(True)),
+            measure(warm, app.display_image, pixels, "pixels", repeat, setup=lambda: reset(False)),
+        ]
+    finally:
+        if app is not None:
+            app.loader.shutdown()
+        root.destroy()
+
+
+def generate_workbook(path, rows, cols, seed=0):
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"Item {i} description text" for i in range(max(1, int(rows * cols * UNIQUE_TEXT_RATIO)))]
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet("Data")
+    sheet.append([f"Column {c}" for c in range(cols)])
+    for r in range(rows):
+        row = []
+        for c in range(cols):
+            kind = (r + c) % 5
+            if kind == 3:
+                row.append(float(rng.random()))
+            elif kind == 4:
+                row.append(f"=A{r + 2}&\"x\"" if c else None)
+            else:
+                row.append(vocabulary[int(rng.integers(len(vocabulary)))])
+        sheet.append(row)
+    wb.save(path)
+    return (rows + 1) * cols
+
+
+def excel_cases(workbooks, folder, repeat, latency):
+    try:
+        import excelTranslate
+        from translation_backends import OfflineBackend
+    except ImportError as e:
+        return [skipped(f"excel.translate_file[{spec}]", str(e)) for spec in workbooks]
+
+    rows = []
+    output_dir = os.path.join(folder, "translated")
+    for spec in workbooks:
+        count, cols = parse_size(spec)
+        path = os.path.join(folder, f"workbook_{spec}.xlsx")
+        cells = generate_workbook(path, count, cols)
+        for streaming in (False, True):
+            case = f"excel.translate_file[{spec}{', streaming' if streaming else ''}]"
+            run = lambda: asyncio.run(excelTranslate.translate_file(
+                path, "en", "tr", output_dir=output_dir, streaming=streaming, cache_path=None,
+                backend=OfflineBackend(latency=latency), progress="off",
+            ))
+            rows.append(measure(case, run, cells, "cells", repeat))
+    return rows
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {row["case"]: row for row in json.load(f)["results"] if "seconds" in row}
+    regressions = []
+    print(f"\nCompared with {baseline_path} (regression threshold {threshold * 100:.0f}%):")
+    for row in results:
+        previous = baseline.get(row["case"])
+        if previous is None or "seconds" not in row:
+            continue
+        ratio = row["seconds"] / previous["seconds"] if previous["seconds"] else float("inf")
+        memory = row["peak_mb"] - previous["peak_mb"]
+        row["baseline_ratio"] = ratio
+        status = "REGRESSION" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "ok")
+        if status == "REGRESSION":
+            regressions.append(row["case"])
+        print(f"{row['case']:<48} {ratio:6.2f}x time  {memory:+8.1f} MB peak  {status}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite for the image recolor and Excel translation tools.")
+    parser.add_argument("--only", choices=("image", "excel"), help="Run only one tool's cases")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_IMAGE_SIZES, help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--workbooks", nargs="+", default=DEFAULT_WORKBOOKS, help="Workbook sizes as ROWSxCOLUMNS")
+    parser.add_argument("--latency", type=float, default=0.002, help="Fake translator latency per request in seconds (default: 0.002)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, best is reported (default: 3)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results previously written with --json")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Slowdown ratio counted as a regression (default: 0.10)")
+    parser.add_argument("--profile", choices=perf_hooks.PROFILE_MODES, help="Profile the hot paths with cProfile or tracemalloc")
+    parser.add_argument("--profile-dir", default=perf_hooks.DEFAULT_PROFILE_DIR, help="Where profiles are written (default: profiles)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        perf_hooks.enable(args.profile, args.profile_dir)
+        print(f"Profiling with {args.profile}: timings include its overhead and are not comparable to a baseline.")
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        if args.only in (None, "image"):
+            results.extend(image_cases(args.sizes, folder, args.repeat))
+        if args.only in (None, "excel"):
+            results.extend(excel_cases(args.workbooks, folder, args.repeat, args.latency))
+
+    regressions = compare(results, args.baseline, args.threshold) if args.baseline else []
+
+    if args.json:
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.profile:
+        for path in perf_hooks.disable():
+            print(f"Profile written: {path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import color_core
+import tiled_io
+from bench_apply_color_change import synthetic_image, parse_size
+
+DEFAULT_SIZES = ["4000x3000", "8000x6000", "16000x12000"]
+SYNTHETIC_ROWS = 64
+PARAMS = ((255, 0, 0), 0.5, 0.3)
+
+CHILD = """
+import sys, json, time, resource
+sys.path.insert(0, {root!r})
+import color_core
+started = time.perf_counter()
+result = color_core.recolor_file({source!r}, {output!r}, {target!r}, {intensity!r}, {sensitivity!r}, tiled={tiled!r})
+seconds = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+try:
+    with open("/proc/self/status") as f:
+        peak = next(int(line.split()[1]) / 1024 for line in f if line.startswith("VmHWM"))
+except (OSError, StopIteration):
+    pass
+print(json.dumps({{"seconds": seconds, "peak_rss_mb": peak, "source_color": result["source_color"]}}))
+"""
+
+
+def run_child(source, output, tiled):
+    code = CHILD.format(root=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), source=source,
+                        output=output, target=PARAMS[0], intensity=PARAMS[1], sensitivity=PARAMS[2], tiled=tiled)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def write_synthetic_png(path, width, height):
+    with tiled_io.PngStripWriter(path, width, height, compress_level=1) as writer:
+        for top in range(0, height, SYNTHETIC_ROWS):
+            rows = min(SYNTHETIC_ROWS, height - top)
+            writer.write(np.asarray(synthetic_image(width, rows, seed=top)))
+
+
+def verify_streamed(source, output, source_color):
+    rules = [(tuple(source_color), PARAMS[0], PARAMS[1], PARAMS[2])]
+    for (_, strip), (_, actual) in zip(tiled_io.iter_strips(source), tiled_io.iter_strips(output)):
+        expected = color_core.recolor_rules(np.array(strip), rules)
+        if not np.array_equal(expected, actual):
+            return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of in-memory vs strip-streamed recolor.")
+    parser.add_argument("sizes", nargs="*", default=DEFAULT_SIZES, help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            width, height = parse_size(size)
+            source = os.path.join(folder, f"{size}.png")
+            write_synthetic_png(source, width, height)
+            in_memory = width * height <= 2 * Image.MAX_IMAGE_PIXELS
+            if not in_memory:
+                print(f"{size:>12} memory: skipped, above Pillow's {2 * Image.MAX_IMAGE_PIXELS:,} pixel limit")
+            outputs = {}
+            for tiled in (False, True) if in_memory else (True,):
+                output = os.path.join(folder, f"{size}_{'tiled' if tiled else 'memory'}.png")
+                row = {"size": size, "tiled": tiled, **run_child(source, output, tiled)}
+                row["output_bytes"] = os.path.getsize(output)
+                outputs[tiled] = output
+                results.append(row)
+                print(f"{size:>12} {'tiled' if tiled else 'memory':>6}: {row['seconds']:.2f}s, "
+                      f"peak RSS {row['peak_rss_mb']:.0f} MB, output {row['output_bytes'] / 1e6:.1f} MB")
+            if in_memory:
+                with Image.open(outputs[False]) as expected, Image.open(outputs[True]) as actual:
+                    identical = np.array_equal(np.asarray(expected), np.asarray(actual))
+            else:
+                identical = verify_streamed(source, outputs[True], results[-1]["source_color"])
+            results[-1]["identical"] = identical
+            print(f"{size:>12} identical pixels: {identical}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,791 @@
+import os
+import glob
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from datetime import datetime
+import numpy as np
+from PIL import Image
+import perf_hooks
+
+CHUNK_PIXELS = 1 << 20
+OUTPUT_SUFFIX = "_renkli"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff")
+OUTPUT_PROFILES = {
+    "png": {"format": "PNG", "extension": ".png", "options": {"compress_level": 6}},
+    "png-fast": {"format": "PNG", "extension": ".png", "options": {"compress_level": 1}},
+    "png-small": {"format": "PNG", "extension": ".png", "options": {"compress_level": 9, "optimize": True}},
+    "webp": {"format": "WEBP", "extension": ".webp", "options": {"lossless": True, "exact": True, "quality": 80, "method": 4}},
+    "webp-fast": {"format": "WEBP", "extension": ".webp", "options": {"lossless": True, "exact": True, "quality": 0, "method": 0}},
+    "jpeg": {"format": "JPEG", "extension": ".jpg", "options": {"quality": 95, "subsampling": 0}, "opaque_only": True, "fallback": "png"},
+}
+DEFAULT_PROFILE = "png"
+PALETTE_MAX_SAMPLES = 200_000
+PALETTE_BITS = 4
+PALETTE_MIN_ALPHA = 125
+DOMINANT_CACHE_SIZE = 256
+FALLBACK_COLOR = (128, 128, 128)
+RULE_CELL_BITS = 5
+RULE_NONE = 255
+RULE_MANY = 254
+MATCH_SPACES = ("rgb", "lab", "hsv")
+LAB_DELTA_E_SCALE = 100.0
+HSV_HUE_SCALE = 0.25
+HSV_MIN_SATURATION = 0.08
+HSV_MIN_VALUE = 0.05
+TILED_MIN_PIXELS = 64_000_000
+LUT_DIR = os.path.join(os.path.expanduser("~"), ".image_color_changer_luts")
+LUT_MEMORY_SLOTS = 4
+LUT_DISK_ENTRIES = 8
+LUT_LOCK_TIMEOUT = 120.0
+LUT_MIN_PIXELS = 40_000_000
+LUT_BYTES = (1 << 24) * 4
+
+_dominant_cache = OrderedDict()
+_dominant_lock = threading.Lock()
+_lut_cache = OrderedDict()
+
+_srgb_levels = np.arange(256, dtype=np.float64) / 255.0
+SRGB_TO_LINEAR = np.where(_srgb_levels <= 0.04045, _srgb_levels / 12.92, ((_srgb_levels + 0.055) / 1.055) ** 2.4).astype(np.float32)
+RGB_TO_XYZ_D65 = (np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+]) / np.array([[0.95047], [1.0], [1.08883]])).T.astype(np.float32)
+LAB_EPSILON = np.float32((6 / 29) ** 3)
+LAB_SLOPE = np.float32(1 / (3 * (6 / 29) ** 2))
+LAB_OFFSET = np.float32(4 / 29)
+
+
+def hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def rgb_to_hex(rgb_color):
+    return '#{:02x}{:02x}{:02x}'.format(*rgb_color)
+
+
+def parse_color_input(color_text):
+    text = color_text.strip()
+    if text.startswith('#'):
+        text = text.upper()
+        if len(text) == 7:
+            return hex_to_rgb(text)
+        if len(text) == 4:
+            r = text[1]*2
+            g = text[2]*2
+            b = text[3]*2
+            return hex_to_rgb('#' + r + g + b)
+    if len(text) in (3, 6) and all(c in '0123456789ABCDEFabcdef' for c in text):
+        if len(text) == 3:
+            text = ''.join(c * 2 for c in text)
+        return hex_to_rgb('#' + text.upper())
+    if ',' in text or ' ' in text:
+        sep = ',' if ',' in text else ' '
+        parts = [p for p in text.split(sep) if p]
+        if len(parts) == 3:
+            r, g, b = [int(float(p)) for p in parts]
+            r = max(0, min(255, r))
+            g = max(0, min(255, g))
+            b = max(0, min(255, b))
+            return (r, g, b)
+    raise ValueError("Geçersiz renk kodu")
+
+
+def output_folder_name(target_color, date=None):
+    color_code = rgb_to_hex(target_color).replace("#", "").upper()
+    current_date = date or datetime.now().strftime("%Y-%m-%d")
+    return f"{color_code} - {current_date}"
+
+
+def output_path(image_path, target_color, output_dir=None, suffix=OUTPUT_SUFFIX, date=None, profile=DEFAULT_PROFILE):
+    original_filename = os.path.splitext(os.path.basename(image_path))[0]
+    save_dir = output_dir or os.path.join(os.path.dirname(image_path), output_folder_name(target_color, date))
+    return os.path.join(save_dir, f"{original_filename}{suffix}{OUTPUT_PROFILES[profile]['extension']}")
+
+
+def is_opaque(image):
+    if "A" not in image.getbands():
+        return "transparency" not in image.info
+    return image.getchannel("A").getextrema()[0] == 255
+
+
+def resolve_profile(image, profile=DEFAULT_PROFILE):
+    spec = OUTPUT_PROFILES[profile]
+    while spec.get("opaque_only") and not is_opaque(image):
+        spec = OUTPUT_PROFILES[spec["fallback"]]
+    return spec
+
+
+def save_image(image, save_path, profile=DEFAULT_PROFILE):
+    spec = resolve_profile(image, profile)
+    save_path = os.path.splitext(save_path)[0] + spec["extension"]
+    os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+    if spec["format"] == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    image.save(save_path, spec["format"], **spec["options"])
+    return save_path
+
+
+def expand_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(
+                os.path.join(pattern, name) for name in os.listdir(pattern)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in matches:
+            if os.path.isfile(path) and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def recolor_array(array, target_color, intensity, sensitivity, source_color, out=None, chunk_pixels=CHUNK_PIXELS):
+    if out is None:
+        out = array
+    elif out is not array:
+        np.copyto(out, array)
+    height, width = array.shape[:2]
+    if height == 0 or width == 0:
+        return out
+
+    thresh = sensitivity * 255.0
+    bound = np.float32((thresh * 1.0001) ** 2)
+    source = np.array(source_color, dtype=np.float32)
+    target = np.array(target_color, dtype=np.float32)
+    chunk_rows = max(1, min(height, chunk_pixels // width))
+    dist_sq = np.empty((chunk_rows, width), dtype=np.float32)
+    scratch = np.empty((chunk_rows, width), dtype=np.float32)
+    candidates = np.empty((chunk_rows, width), dtype=bool)
+
+    for top in range(0, height, chunk_rows):
+        rows = min(chunk_rows, height - top)
+        block = array[top:top + rows]
+        sq = dist_sq[:rows]
+        tmp = scratch[:rows]
+        np.subtract(block[:, :, 0], source[0], out=sq, dtype=np.float32)
+        np.multiply(sq, sq, out=sq)
+        for channel in (1, 2):
+            np.subtract(block[:, :, channel], source[channel], out=tmp, dtype=np.float32)
+            np.multiply(tmp, tmp, out=tmp)
+            np.add(sq, tmp, out=sq)
+        mask = candidates[:rows]
+        np.less(sq, bound, out=mask)
+        mask &= block[:, :, 3] > 0
+
+        index = np.flatnonzero(mask)
+        if index.size == 0:
+            continue
+        dist = np.sqrt(sq.reshape(-1)[index])
+        keep = dist < thresh
+        index = index[keep]
+        dist = dist[keep]
+        if index.size == 0:
+            continue
+
+        factor = intensity * (1.0 - (dist / thresh))
+        np.clip(factor, 0.0, 1.0, out=factor)
+        factor = factor[:, np.newaxis]
+        row, col = np.divmod(index, width)
+        pixels = block[row, col, :3].astype(np.float32)
+        blend = pixels * (1.0 - factor) + target * factor
+        np.clip(blend, 0, 255, out=blend)
+        out[top + row, col, :3] = blend.astype(np.uint8)
+    return out
+
+
+@perf_hooks.hook()
+def apply_color_change(image, target_color, intensity, sensitivity, source_color, space="rgb", chunk_pixels=CHUNK_PIXELS):
+    if source_color is None:
+        return image
+    array = np.array(image)
+    if len(array.shape) != 3 or array.shape[2] != 4:
+        return image
+    if space == "rgb":
+        recolor_array(array, target_color, intensity, sensitivity, source_color, chunk_pixels=chunk_pixels)
+    else:
+        recolor_space(array, [(source_color, target_color, intensity, sensitivity)], space, chunk_pixels=chunk_pixels)
+    return Image.fromarray(array)
+
+
+def rgb_to_lab(rgb):
+    xyz = SRGB_TO_LINEAR[rgb] @ RGB_TO_XYZ_D65
+    f = np.cbrt(xyz)
+    small = xyz <= LAB_EPSILON
+    if small.any():
+        f[small] = xyz[small] * LAB_SLOPE + LAB_OFFSET
+    lab = np.empty_like(f)
+    np.multiply(f[..., 1], 116.0, out=lab[..., 0])
+    lab[..., 0] -= 16.0
+    np.subtract(f[..., 0], f[..., 1], out=lab[..., 1])
+    lab[..., 1] *= 500.0
+    np.subtract(f[..., 1], f[..., 2], out=lab[..., 2])
+    lab[..., 2] *= 200.0
+    return lab
+
+
+def rgb_to_hsv(rgb):
+    r, g, b = (rgb[..., channel].astype(np.float32) for channel in range(3))
+    value = np.maximum(np.maximum(r, g), b)
+    delta = value - np.minimum(np.minimum(r, g), b)
+    red_max = value == r
+    green_max = ~red_max & (value == g)
+    numerator = np.where(red_max, g - b, np.where(green_max, b - r, r - g))
+    numerator /= np.where(delta > 0, delta, 1.0)
+    numerator += 4.0
+    numerator -= 4.0 * red_max + 2.0 * green_max
+    numerator /= 6.0
+    numerator += numerator < 0
+    hue = np.where(delta > 0, numerator, 0.0)
+    saturation = delta / np.where(value > 0, value, 1.0)
+    return np.stack([hue, saturation, value / 255.0], axis=-1)
+
+
+def hsv_to_rgb(hsv):
+    hue, saturation, value = hsv[..., 0] * 6.0, hsv[..., 1], hsv[..., 2] * 255.0
+    chroma = value * saturation
+    channels = []
+    for offset in (5.0, 3.0, 1.0):
+        k = hue + offset
+        k -= 6.0 * (k >= 6.0)
+        ramp = np.minimum(k, 4.0 - k)
+        np.clip(ramp, 0.0, 1.0, out=ramp)
+        channels.append(value - chroma * ramp)
+    return np.stack(channels, axis=-1)
+
+
+@lru_cache(maxsize=256)
+def color_to_lab(color):
+    return rgb_to_lab(np.array(color, dtype=np.uint8))
+
+
+@lru_cache(maxsize=256)
+def color_to_hsv(color):
+    return rgb_to_hsv(np.array(color, dtype=np.uint8))
+
+
+@lru_cache(maxsize=4)
+def cell_corners(space, bits=RULE_CELL_BITS):
+    step = 1 << (8 - bits)
+    count = 1 << bits
+    starts = np.arange(count) * step
+    levels = np.stack([starts, starts + step - 1], axis=1).reshape(-1).astype(np.uint8)
+    grid = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1)
+    coords = rgb_to_lab(grid) if space == "lab" else rgb_to_hsv(grid)
+    corners = np.stack([coords[a::2, b::2, c::2] for a in (0, 1) for b in (0, 1) for c in (0, 1)], axis=3)
+    corners = corners.reshape(count ** 3, 8, -1)
+    if space == "lab":
+        pairs = [(i, j) for i in range(8) for j in range(i + 1, 8)]
+        diameter = np.max([np.sqrt(((corners[:, i] - corners[:, j]) ** 2).sum(axis=1)) for i, j in pairs], axis=0)
+        return corners, diameter
+    low = starts.reshape(-1, 1, 1)
+    touches_gray = (np.maximum(np.maximum(low, low.transpose(1, 0, 2)), low.transpose(2, 1, 0))
+                    <= np.minimum(np.minimum(low, low.transpose(1, 0, 2)), low.transpose(2, 1, 0)) + step - 1).reshape(-1)
+    hues = np.sort(corners[:, :, 0], axis=1)
+    gaps = np.diff(np.concatenate([hues, hues[:, :1] + 1.0], axis=1), axis=1)
+    widest = gaps.argmax(axis=1)
+    arc_start = hues[np.arange(len(hues)), (widest + 1) % 8]
+    arc_length = 1.0 - gaps.max(axis=1)
+    return touches_gray, arc_start, arc_length
+
+
+def space_cells(space, sources, thresholds, bits=RULE_CELL_BITS):
+    if space == "lab":
+        corners, diameter = cell_corners(space, bits)
+        cells = np.zeros(len(corners), dtype=bool)
+        for source, thresh in zip(sources, thresholds):
+            nearest = np.sqrt(((corners - source) ** 2).sum(axis=2)).min(axis=1)
+            cells |= nearest < thresh + diameter + 0.01
+        return cells
+    touches_gray, arc_start, arc_length = cell_corners(space, bits)
+    cells = touches_gray.copy()
+    for source, thresh in zip(sources, thresholds):
+        offset = (source[0] - arc_start) % 1.0
+        distance = np.where(offset <= arc_length, 0.0, np.minimum(offset - arc_length, 1.0 - offset))
+        cells |= distance < thresh + 1e-4
+    return cells
+
+
+def recolor_space(array, rules, space, out=None, chunk_pixels=CHUNK_PIXELS, bits=RULE_CELL_BITS):
+    if space not in MATCH_SPACES:
+        raise ValueError(f"Unknown match space: {space}")
+    if out is None:
+        out = array
+    elif out is not array:
+        np.copyto(out, array)
+    rules = [rule for rule in rules if rule[0] is not None]
+    height, width = array.shape[:2]
+    if not rules or height == 0 or width == 0:
+        return out
+    if space == "rgb":
+        return recolor_rules(out, rules, chunk_pixels=chunk_pixels)
+
+    convert = color_to_lab if space == "lab" else color_to_hsv
+    sources = [convert(tuple(int(c) for c in rule[0])) for rule in rules]
+    targets = np.array([rule[1] for rule in rules], dtype=np.float32)
+    target_hsv = np.array([color_to_hsv(tuple(int(c) for c in rule[1])) for rule in rules], dtype=np.float32)
+    intensities = np.array([rule[2] for rule in rules], dtype=np.float32)
+    scale = LAB_DELTA_E_SCALE if space == "lab" else HSV_HUE_SCALE
+    thresholds = [np.float32(rule[3] * scale) for rule in rules]
+    cells = space_cells(space, sources, thresholds, bits)
+    shift = 8 - bits
+    chunk_rows = max(1, min(height, chunk_pixels // width))
+    code = np.empty((chunk_rows, width), dtype=np.uint16)
+    scratch = np.empty((chunk_rows, width), dtype=np.uint16)
+
+    for top in range(0, height, chunk_rows):
+        rows = min(chunk_rows, height - top)
+        key = code[:rows]
+        tmp = scratch[:rows]
+        np.right_shift(array[top:top + rows, :, 0], shift, out=key, dtype=np.uint16)
+        for channel in (1, 2):
+            np.left_shift(key, bits, out=key)
+            np.right_shift(array[top:top + rows, :, channel], shift, out=tmp, dtype=np.uint16)
+            np.bitwise_or(key, tmp, out=key)
+        block = array[top:top + rows].reshape(-1, 4)
+        candidates = cells.take(key.reshape(-1))
+        candidates &= block[:, 3] > 0
+        index = np.flatnonzero(candidates)
+        if index.size == 0:
+            continue
+        packed = np.ascontiguousarray(array[top:top + rows]).view("<u4").reshape(-1)[index]
+        rgb = packed.view(np.uint8).reshape(-1, 4)[:, :3]
+        coords = rgb_to_lab(rgb) if space == "lab" else rgb_to_hsv(rgb)
+        best = np.zeros(index.size, dtype=np.intp)
+        best_ratio = None
+        for k, source in enumerate(sources):
+            if space == "lab":
+                diff = coords - source
+                diff *= diff
+                dist = np.sqrt(diff[:, 0] + diff[:, 1] + diff[:, 2])
+            else:
+                dist = np.abs(coords[:, 0] - source[0])
+                np.minimum(dist, 1.0 - dist, out=dist)
+            ratio = dist / thresholds[k]
+            if best_ratio is None:
+                best_ratio = ratio
+                continue
+            better = ratio < best_ratio
+            best[better] = k
+            best_ratio[better] = ratio[better]
+        keep = best_ratio < 1.0
+        if space == "hsv":
+            keep &= (coords[:, 1] >= HSV_MIN_SATURATION) & (coords[:, 2] >= HSV_MIN_VALUE)
+        keep = np.flatnonzero(keep)
+        if keep.size == 0:
+            continue
+        index, best, coords, packed = index[keep], best[keep], coords.take(keep, axis=0), packed[keep]
+        factor = intensities[best] * (1.0 - best_ratio[keep])
+        np.clip(factor, 0.0, 1.0, out=factor)
+
+        if space == "lab":
+            factor = factor[:, np.newaxis]
+            blend = packed.view(np.uint8).reshape(-1, 4)[:, :3].astype(np.float32) * (1.0 - factor) + targets[best] * factor
+        else:
+            hue_shift = target_hsv[best, 0] - coords[:, 0]
+            hue_shift -= np.rint(hue_shift)
+            hue = coords[:, 0]
+            hue += factor * hue_shift
+            hue -= np.floor(hue)
+            coords[:, 1] += factor * (target_hsv[best, 1] - coords[:, 1])
+            blend = hsv_to_rgb(coords)
+            np.rint(blend, out=blend)
+        np.clip(blend, 0, 255, out=blend)
+        result = packed.view(np.uint8).reshape(-1, 4)
+        result[:, :3] = blend
+        out[top:top + rows].reshape(-1).view("<u4")[index] = packed
+    return out
+
+
+def build_rule_cells(sources, thresholds, bits=RULE_CELL_BITS):
+    step = 1 << (8 - bits)
+    levels = (np.arange(1 << bits, dtype=np.float64) + 0.5) * step - 0.5
+    grid = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1).reshape(-1, 3)
+    reach = np.asarray(thresholds, dtype=np.float64) * 1.0001 + (step - 1) / 2 * np.sqrt(3)
+    hits = np.empty((len(grid), len(reach)), dtype=bool)
+    for k, source in enumerate(np.asarray(sources, dtype=np.float64)):
+        hits[:, k] = np.sqrt(((grid - source) ** 2).sum(axis=1)) < reach[k]
+    count = hits.sum(axis=1)
+    cells = np.full(len(grid), RULE_NONE, dtype=np.uint8)
+    cells[count == 1] = hits[count == 1].argmax(axis=1)
+    cells[count > 1] = RULE_MANY
+    shared = hits & (count > 1)[:, np.newaxis]
+    return cells, [np.flatnonzero(shared[:, k]) for k in range(len(reach))]
+
+
+def recolor_rules(array, rules, out=None, chunk_pixels=CHUNK_PIXELS, bits=RULE_CELL_BITS, space="rgb"):
+    if space != "rgb":
+        return recolor_space(array, rules, space, out=out, chunk_pixels=chunk_pixels)
+    if out is None:
+        out = array
+    elif out is not array:
+        np.copyto(out, array)
+    rules = [rule for rule in rules if rule[0] is not None]
+    height, width = array.shape[:2]
+    if not rules or height == 0 or width == 0:
+        return out
+    if len(rules) >= RULE_MANY:
+        raise ValueError(f"At most {RULE_MANY - 1} recolor rules are supported")
+    if len(rules) == 1:
+        source_color, target_color, intensity, sensitivity = rules[0]
+        return recolor_array(out, target_color, intensity, sensitivity, source_color, chunk_pixels=chunk_pixels)
+
+    sources = np.array([rule[0] for rule in rules], dtype=np.float32)
+    targets = np.array([rule[1] for rule in rules], dtype=np.float32)
+    intensities = np.array([rule[2] for rule in rules], dtype=np.float32)
+    thresholds = np.array([rule[3] * 255.0 for rule in rules], dtype=np.float32)
+    cells, overlaps = build_rule_cells(sources, thresholds, bits)
+    shared = [k for k, overlap in enumerate(overlaps) if overlap.size]
+    shift = 8 - bits
+    chunk_rows = max(1, min(height, chunk_pixels // width))
+    code = np.empty((chunk_rows, width), dtype=np.uint16)
+    scratch = np.empty((chunk_rows, width), dtype=np.uint16)
+
+    for top in range(0, height, chunk_rows):
+        rows = min(chunk_rows, height - top)
+        block = array[top:top + rows]
+        index = code[:rows]
+        tmp = scratch[:rows]
+        np.right_shift(block[:, :, 0], shift, out=index, dtype=np.uint16)
+        for channel in (1, 2):
+            np.left_shift(index, bits, out=index)
+            np.right_shift(block[:, :, channel], shift, out=tmp, dtype=np.uint16)
+            np.bitwise_or(index, tmp, out=index)
+        rule = cells.take(index.reshape(-1))
+        rule[block[:, :, 3].reshape(-1) == 0] = RULE_NONE
+
+        flat = np.flatnonzero(rule != RULE_NONE)
+        if flat.size == 0:
+            continue
+        packed = np.ascontiguousarray(block).view("<u4").reshape(-1).take(flat)
+        pixels = packed.view(np.uint8).reshape(-1, 4)[:, :3].astype(np.float32)
+        rule = rule.take(flat).astype(np.intp)
+        ratio = np.empty(flat.size, dtype=np.float32)
+
+        many = rule == RULE_MANY
+        single = np.flatnonzero(~many)
+        if single.size:
+            picked = rule.take(single)
+            diff = pixels.take(single, axis=0) - sources.take(picked, axis=0)
+            sq = diff[:, 0] * diff[:, 0]
+            sq += diff[:, 1] * diff[:, 1]
+            sq += diff[:, 2] * diff[:, 2]
+            ratio[single] = np.sqrt(sq) / thresholds.take(picked)
+
+        many = np.flatnonzero(many)
+        if many.size:
+            keys = index.reshape(-1).take(flat.take(many))
+            many = many.take(np.argsort(keys, kind="stable"))
+            counts = np.bincount(keys, minlength=len(cells))
+            starts = np.cumsum(counts) - counts
+            channels = pixels.take(many, axis=0).T.copy()
+            best = np.full(many.size, RULE_NONE, dtype=np.intp)
+            best_ratio = np.full(many.size, np.inf, dtype=np.float32)
+            for k in shared:
+                lengths = counts.take(overlaps[k])
+                total = int(lengths.sum())
+                if total == 0:
+                    continue
+                near = np.arange(total) + np.repeat(starts.take(overlaps[k]) - (np.cumsum(lengths) - lengths), lengths)
+                diff = channels[0].take(near) - sources[k, 0]
+                sq = diff * diff
+                for channel in (1, 2):
+                    diff = channels[channel].take(near) - sources[k, channel]
+                    diff *= diff
+                    sq += diff
+                near_ratio = np.sqrt(sq) / thresholds[k]
+                better = near_ratio < best_ratio.take(near)
+                near = near[better]
+                best[near] = k
+                best_ratio[near] = near_ratio[better]
+            rule[many] = best
+            ratio[many] = best_ratio
+
+        keep = np.flatnonzero(ratio < 1.0)
+        if keep.size == 0:
+            continue
+        flat, packed, pixels, rule = flat.take(keep), packed.take(keep), pixels.take(keep, axis=0), rule.take(keep)
+
+        factor = intensities.take(rule) * (1.0 - ratio.take(keep))
+        np.clip(factor, 0.0, 1.0, out=factor)
+        factor = factor[:, np.newaxis]
+        pixels *= 1.0 - factor
+        blend = targets.take(rule, axis=0)
+        blend *= factor
+        blend += pixels
+        np.clip(blend, 0, 255, out=blend)
+        packed.view(np.uint8).reshape(-1, 4)[:, :3] = blend
+        out[top:top + rows].reshape(-1).view("<u4")[flat] = packed
+    return out
+
+
+def apply_rules(image, rules, space="rgb", chunk_pixels=CHUNK_PIXELS):
+    array = np.array(image)
+    if len(array.shape) != 3 or array.shape[2] != 4:
+        return image
+    recolor_rules(array, rules, chunk_pixels=chunk_pixels, space=space)
+    return Image.fromarray(array)
+
+
+def lut_key(rules, space="rgb"):
+    normalized = [space] + [[list(map(int, source)), list(map(int, target)), float(intensity), float(sensitivity)]
+                            for source, target, intensity, sensitivity in rules]
+    return hashlib.blake2b(json.dumps(normalized).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def build_lut(rules, space="rgb"):
+    identity = (np.arange(1 << 24, dtype="<u4") | np.uint32(0xFF000000)).view(np.uint8).reshape(4096, 4096, 4)
+    recolor_rules(identity, rules, space=space)
+    return identity.view("<u4").reshape(-1)
+
+
+def read_lut(path):
+    try:
+        lut = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if lut.shape != (1 << 24,) or lut.dtype != np.dtype("<u4"):
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return lut
+
+
+def write_lut(lut, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, lut)
+    os.replace(tmp_path, path)
+    stored = []
+    for name in os.listdir(os.path.dirname(path)):
+        if not name.endswith(".npy"):
+            continue
+        stored_path = os.path.join(os.path.dirname(path), name)
+        try:
+            stored.append((os.path.getmtime(stored_path), stored_path))
+        except OSError:
+            continue
+    stored.sort()
+    for _, old_path in stored[:-LUT_DISK_ENTRIES]:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+
+
+def load_disk_lut(rules, path, space="rgb"):
+    lock_path = path + ".lock"
+    deadline = time.monotonic() + LUT_LOCK_TIMEOUT
+    while True:
+        lut = read_lut(path)
+        if lut is not None:
+            return lut
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                stale = time.time() - os.path.getmtime(lock_path) > LUT_LOCK_TIMEOUT
+            except OSError:
+                continue
+            if stale:
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+            elif time.monotonic() < deadline:
+                time.sleep(0.05)
+            else:
+                return build_lut(rules, space)
+            continue
+        try:
+            os.close(fd)
+            lut = read_lut(path)
+            if lut is None:
+                lut = build_lut(rules, space)
+                write_lut(lut, path)
+            return lut
+        finally:
+            os.remove(lock_path)
+
+
+def load_lut(rules, cache_dir=LUT_DIR, space="rgb"):
+    key = lut_key(rules, space)
+    if key in _lut_cache:
+        _lut_cache.move_to_end(key)
+        return _lut_cache[key]
+    lut = load_disk_lut(rules, os.path.join(cache_dir, f"{key}.npy"), space) if cache_dir else build_lut(rules, space)
+    _lut_cache[key] = lut
+    if len(_lut_cache) > LUT_MEMORY_SLOTS:
+        _lut_cache.popitem(last=False)
+    return lut
+
+
+def lut_pays_off(paths, min_pixels=LUT_MIN_PIXELS):
+    from tiled_io import image_size
+
+    total = 0
+    for path in paths:
+        try:
+            width, height = image_size(path)
+        except (OSError, ValueError):
+            continue
+        total += width * height
+        if total >= min_pixels:
+            return True
+    return False
+
+
+def apply_lut_array(array, lut, out=None, chunk_pixels=CHUNK_PIXELS):
+    if out is None:
+        out = array
+    height, width = array.shape[:2]
+    if height == 0 or width == 0:
+        return out
+    pixels = np.ascontiguousarray(array).view("<u4").reshape(height, width)
+    result = out.view("<u4").reshape(height, width)
+    chunk_rows = max(1, min(height, chunk_pixels // width))
+    keys = np.empty((chunk_rows, width), dtype="<u4")
+    mapped = np.empty((chunk_rows, width), dtype="<u4")
+
+    for top in range(0, height, chunk_rows):
+        rows = min(chunk_rows, height - top)
+        block = pixels[top:top + rows]
+        key = keys[:rows]
+        value = mapped[:rows]
+        np.bitwise_and(block, np.uint32(0x00FFFFFF), out=key)
+        np.take(lut, key, out=value, mode="clip")
+        np.bitwise_and(value, np.uint32(0x00FFFFFF), out=value)
+        np.bitwise_and(block, np.uint32(0xFF000000), out=key)
+        np.bitwise_or(value, key, out=value)
+        np.copyto(value, block, where=key == 0)
+        result[top:top + rows] = value
+    return out
+
+
+def apply_lut(image, lut, chunk_pixels=CHUNK_PIXELS):
+    array = np.array(image)
+    if len(array.shape) != 3 or array.shape[2] != 4:
+        return image
+    apply_lut_array(array, lut, chunk_pixels=chunk_pixels)
+    return Image.fromarray(array)
+
+
+def sample_step(count, max_samples=PALETTE_MAX_SAMPLES):
+    return -(-count // max_samples) if count > max_samples else 1
+
+
+def extract_palette(image, color_count=5, max_samples=PALETTE_MAX_SAMPLES, bits=PALETTE_BITS, iterations=3):
+    array = np.asarray(image.convert("RGBA") if isinstance(image, Image.Image) else image)
+    pixels = array.reshape(-1, array.shape[-1])
+    pixels = pixels[::sample_step(len(pixels), max_samples)]
+    if pixels.shape[1] == 4:
+        pixels = pixels[pixels[:, 3] >= PALETTE_MIN_ALPHA]
+    rgb = pixels[:, :3]
+    not_white = ~np.all(rgb > 250, axis=1)
+    if not_white.any():
+        rgb = rgb[not_white]
+    if len(rgb) == 0:
+        return []
+
+    shift = 8 - bits
+    mask = (1 << bits) - 1
+    quantized = (rgb >> shift).astype(np.intp)
+    bins = (quantized[:, 0] << (2 * bits)) | (quantized[:, 1] << bits) | quantized[:, 2]
+    counts = np.bincount(bins, minlength=1 << (3 * bits))
+    candidates = np.argsort(counts, kind="stable")[::-1][:color_count * 16]
+    candidates = candidates[counts[candidates] > 0]
+    coords = np.stack([(candidates >> (2 * bits)) & mask, (candidates >> bits) & mask, candidates & mask], axis=1)
+
+    chosen = []
+    for i in range(len(candidates)):
+        if all(np.abs(coords[i] - coords[j]).max() > 1 for j in chosen):
+            chosen.append(i)
+            if len(chosen) == color_count:
+                break
+
+    samples = rgb.astype(np.float32)
+    centers = (coords[chosen].astype(np.float32) + 0.5) * (1 << shift)
+    radius_sq = (1.5 * (1 << shift)) ** 2
+    for _ in range(iterations):
+        dist_sq = ((samples[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2)
+        for k in range(len(centers)):
+            near = dist_sq[:, k] < radius_sq
+            if near.any():
+                centers[k] = samples[near].mean(axis=0)
+    palette = []
+    for center in np.rint(centers):
+        if all(((center - np.array(other)) ** 2).sum() >= radius_sq for other in palette):
+            palette.append(tuple(int(c) for c in center))
+    return palette
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@perf_hooks.hook()
+def get_dominant_color(image_path, image=None, sampler=None, digest=None):
+    try:
+        key = digest or file_digest(image_path)
+        with _dominant_lock:
+            if key in _dominant_cache:
+                _dominant_cache.move_to_end(key)
+                return _dominant_cache[key]
+        if sampler is not None:
+            image = sampler()
+        elif image is None:
+            image = Image.open(image_path)
+        palette = extract_palette(image, color_count=1)
+        color = palette[0] if palette else FALLBACK_COLOR
+        with _dominant_lock:
+            _dominant_cache[key] = color
+            if len(_dominant_cache) > DOMINANT_CACHE_SIZE:
+                _dominant_cache.popitem(last=False)
+        return color
+    except Exception:
+        return FALLBACK_COLOR
+
+
+@perf_hooks.hook()
+def recolor_file(image_path, save_path, target_color, intensity, sensitivity, source_color=None, rules=(),
+                 use_lut=False, lut_dir=LUT_DIR, space="rgb", tiled=None, profile=DEFAULT_PROFILE, digest=None):
+    if tiled is None:
+        from tiled_io import image_size
+
+        width, height = image_size(image_path)
+        tiled = width * height >= TILED_MIN_PIXELS
+    if tiled:
+        from tiled_io import recolor_file_tiled
+
+        return recolor_file_tiled(image_path, save_path, target_color, intensity, sensitivity, source_color, rules,
+                                  use_lut, lut_dir, space, profile=profile, digest=digest)
+    started = time.perf_counter()
+    image = Image.open(image_path).convert("RGBA")
+    fixed_source = source_color is not None
+    if source_color is None:
+        source_color = get_dominant_color(image_path, image, digest=digest)
+    all_rules = list(rules) + [(source_color, target_color, intensity, sensitivity)]
+    if use_lut and fixed_source:
+        result = apply_lut(image, load_lut(all_rules, lut_dir, space))
+    elif rules:
+        result = apply_rules(image, all_rules, space)
+    else:
+        result = apply_color_change(image, target_color, intensity, sensitivity, source_color, space)
+    save_path = save_image(result, save_path, profile)
+    return {"path": image_path, "save_path": save_path, "source_color": tuple(source_color),
+            "seconds": time.perf_counter() - started}
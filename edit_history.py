@@ -0,0 +1,216 @@
+import zlib
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+import color_core
+
+HISTORY_MEMORY_BUDGET = 256 * 1024 * 1024
+HISTORY_KEYFRAME_INTERVAL = 8
+HISTORY_RECENT_FRAMES = 2
+HISTORY_MAX_STATES = 100
+DIFF_TILE = 256
+COMPRESS_LEVEL = 1
+ABSOLUTE_OPS = ("original", "recolor", "rules", "snapshot")
+
+
+def frame_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+def snapshot_op(image):
+    return ("snapshot", image.mode, image.size, zlib.compress(image.tobytes(), COMPRESS_LEVEL))
+
+
+def diff_tiles(before, after, tile=DIFF_TILE):
+    if before.mode != after.mode or before.size != after.size:
+        return None
+    old = np.asarray(before)
+    new = np.asarray(after)
+    height, width = new.shape[:2]
+    tiles = []
+    for top in range(0, height, tile):
+        for left in range(0, width, tile):
+            block = new[top:top + tile, left:left + tile]
+            if not np.array_equal(old[top:top + tile, left:left + tile], block):
+                data = zlib.compress(np.ascontiguousarray(block).tobytes(), COMPRESS_LEVEL)
+                tiles.append((top, left, block.shape[0], block.shape[1], data))
+    return tiles
+
+
+def apply_tiles(image, tiles):
+    array = np.array(image)
+    for top, left, rows, cols, data in tiles:
+        block = np.frombuffer(zlib.decompress(data), dtype=array.dtype)
+        array[top:top + rows, left:left + cols] = block.reshape((rows, cols) + array.shape[2:])
+    return Image.fromarray(array, image.mode)
+
+
+def op_bytes(op):
+    if op[0] == "snapshot":
+        return len(op[3])
+    if op[0] == "diff":
+        return sum(len(tile[4]) for tile in op[1])
+    return 0
+
+
+class EditHistory:
+    def __init__(self, original, memory_budget=HISTORY_MEMORY_BUDGET, keyframe_interval=HISTORY_KEYFRAME_INTERVAL,
+                 max_states=HISTORY_MAX_STATES, recent_frames=HISTORY_RECENT_FRAMES):
+        self.original = original
+        self.memory_budget = memory_budget
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.max_states = max(1, max_states)
+        self.recent_frames = max(0, recent_frames)
+        self.entries = [("original",)]
+        self.index = 0
+        self.current = original
+        self.frames = OrderedDict()
+        self.keyframes = set()
+        self.frame_bytes = 0
+        self.op_bytes = 0
+        self.renders = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def can_undo(self):
+        return self.index > 0
+
+    def can_redo(self):
+        return self.index < len(self.entries) - 1
+
+    def record(self, op, image):
+        if op is None:
+            tiles = diff_tiles(self.current, image)
+            op = ("diff", tiles) if tiles is not None else snapshot_op(image)
+        self.truncate()
+        self.cache(self.index, self.current)
+        self.entries.append(op)
+        self.op_bytes += op_bytes(op)
+        self.index += 1
+        self.current = image
+        if op[0] == "diff" and self.chain_length(self.index) >= self.keyframe_interval:
+            self.keyframes.add(self.index)
+            self.cache(self.index, image)
+        self.trim(drop_states=True)
+        return image
+
+    def undo(self):
+        return self.move(self.index - 1) if self.can_undo() else None
+
+    def redo(self):
+        return self.move(self.index + 1) if self.can_redo() else None
+
+    def move(self, index):
+        image = self.render(index)
+        self.cache(self.index, self.current)
+        self.index = index
+        self.current = image
+        self.trim()
+        return image
+
+    def render(self, index):
+        if index == self.index:
+            return self.current
+        start = index
+        while start not in self.frames and self.entries[start][0] not in ABSOLUTE_OPS:
+            start -= 1
+        if start in self.frames:
+            image = self.frames[start]
+            self.frames.move_to_end(start)
+        else:
+            image = self.replay(self.entries[start], None)
+        for i in range(start + 1, index + 1):
+            image = self.replay(self.entries[i], image)
+        return image
+
+    def replay(self, op, image):
+        self.renders += 1
+        kind = op[0]
+        if kind == "original":
+            return self.original
+        if kind == "recolor":
+            return color_core.apply_color_change(self.original, *op[1:])
+        if kind == "rules":
+            return color_core.apply_rules(self.original, *op[1:])
+        if kind == "snapshot":
+            return Image.frombytes(op[1], op[2], zlib.decompress(op[3]))
+        if kind == "diff":
+            return apply_tiles(image, op[1])
+        raise ValueError(f"Unknown history operation: {kind}")
+
+    def chain_length(self, index):
+        length = 0
+        while self.entries[index][0] == "diff" and (length == 0 or index not in self.keyframes):
+            length += 1
+            index -= 1
+        return length
+
+    def cache(self, index, image):
+        if self.entries[index][0] == "original" or index in self.frames:
+            return
+        self.frames[index] = image
+        self.frame_bytes += frame_bytes(image)
+
+    def uncache(self, index):
+        image = self.frames.pop(index)
+        self.frame_bytes -= frame_bytes(image)
+
+    def truncate(self):
+        for index in range(self.index + 1, len(self.entries)):
+            self.op_bytes -= op_bytes(self.entries[index])
+            if index in self.frames:
+                self.uncache(index)
+            self.keyframes.discard(index)
+        del self.entries[self.index + 1:]
+
+    def memory_usage(self):
+        return self.frame_bytes + self.op_bytes
+
+    def recent(self):
+        return [index for index in self.frames if index != self.index and index not in self.keyframes]
+
+    def evict_frame(self):
+        recent = self.recent()
+        if recent:
+            self.uncache(recent[0])
+            return True
+        keyframes = sorted(index for index in self.frames if index != self.index)
+        if keyframes:
+            self.uncache(keyframes[0])
+            return True
+        return False
+
+    def drop_oldest(self):
+        if self.entries[1][0] not in ABSOLUTE_OPS:
+            op = snapshot_op(self.render(1))
+            self.op_bytes += op_bytes(op) - op_bytes(self.entries[1])
+            self.entries[1] = op
+        self.op_bytes -= op_bytes(self.entries[0])
+        if 0 in self.frames:
+            self.uncache(0)
+        del self.entries[0]
+        self.frames = OrderedDict((index - 1, image) for index, image in self.frames.items())
+        self.keyframes = {index - 1 for index in self.keyframes if index > 0}
+        self.index -= 1
+
+    def trim(self, drop_states=False):
+        while drop_states and len(self.entries) > self.max_states and self.index > 0:
+            self.drop_oldest()
+        for index in self.recent()[:-self.recent_frames or None]:
+            self.uncache(index)
+        while self.memory_usage() > self.memory_budget and self.evict_frame():
+            pass
+        while drop_states and self.memory_usage() > self.memory_budget and self.index > 0:
+            self.drop_oldest()
+
+    def stats(self):
+        return {
+            "states": len(self.entries),
+            "index": self.index,
+            "frames": len(self.frames),
+            "keyframes": len(self.keyframes),
+            "frame_bytes": self.frame_bytes,
+            "op_bytes": self.op_bytes,
+            "renders": self.renders,
+        }
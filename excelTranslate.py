@@ -1,7 +1,432 @@
 import os
+import sys
+import glob
+import time
 import asyncio
-from openpyxl import load_workbook
-from googletrans import Translator
+import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+from translation_backends import (
+    BACKENDS,
+    AdaptiveRateLimiter,
+    LatencyHistogram,
+    ManagedBackend,
+    make_backend,
+)
+from translation_cache import TranslationCache, DEFAULT_CACHE_PATH
+from translation_journal import TranslationJournal, journal_path
+from translation_progress import ProgressReporter
+import perf_hooks
+
+BATCH_SIZE = 50
+MAX_CONCURRENCY = 8
+REQUEST_TIMEOUT = 30.0
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0
+STREAM_WINDOW = 1000
+STREAMING_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+_worker_rate_limiter = None
+
+
+def classify(value):
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        return "skipped_non_string"
+    if value.strip().startswith("="):
+        return "skipped_formula"
+    return "text"
+
+
+def is_translatable(value):
+    return classify(value) == "text"
+
+
+def collect_cells(wb, progress=None):
+    cells = []
+    for sheet in wb.worksheets:
+        for row in sheet.iter_rows():
+            for cell in row:
+                kind = classify(cell.value)
+                if kind is None:
+                    continue
+                if progress is not None:
+                    progress.add("scanned")
+                if kind == "text":
+                    cells.append((sheet.title, cell.coordinate, cell.value))
+                elif progress is not None:
+                    progress.add(kind)
+    return cells
+
+
+async def translate_batch(backend, texts, src_lang, dest_lang, semaphore,
+                          timeout=REQUEST_TIMEOUT, retries=MAX_RETRIES, backoff=RETRY_BACKOFF):
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                return await backend.translate(list(texts), src_lang, dest_lang, timeout=timeout)
+        except Exception:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff * (2 ** attempt))
+
+
+async def translate_texts(backend, texts, src_lang, dest_lang, batch_size=BATCH_SIZE,
+                          concurrency=MAX_CONCURRENCY, timeout=REQUEST_TIMEOUT,
+                          retries=MAX_RETRIES, backoff=RETRY_BACKOFF, on_batch=None, on_error=None):
+    if not isinstance(backend, ManagedBackend):
+        backend = ManagedBackend(make_backend(backend))
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(texts)
+    errors = []
+
+    async def run(start):
+        chunk = texts[start:start + batch_size]
+        try:
+            translated = await translate_batch(
+                backend, chunk, src_lang, dest_lang, semaphore, timeout, retries, backoff
+            )
+            results[start:start + len(chunk)] = translated
+            if on_batch is not None:
+                on_batch(chunk, translated)
+        except Exception as e:
+            errors.append((start, len(chunk), e))
+            if on_error is not None:
+                on_error(chunk, e)
+
+    await asyncio.gather(*(run(start) for start in range(0, len(texts), batch_size)))
+    return results, errors
+
+
+def apply_translations(wb, cells, results):
+    written = 0
+    for (sheet_title, coordinate, value), text in zip(cells, results):
+        if text is None:
+            continue
+        wb[sheet_title][coordinate].value = text
+        written += 1
+    return written
+
+
+async def translate_unique(texts, backend, src_lang, dest_lang, cache=None, journal=None,
+                           progress=None, locations=None, **options):
+    counts = Counter(texts)
+    where = defaultdict(list)
+    for text, location in zip(texts, locations or ()):
+        where[text].append(location)
+    unique = list(counts)
+    done = journal.translations if journal is not None else {}
+    translated = {text: done[text] for text in unique if text in done}
+    if cache is not None:
+        translated.update(cache.get_many([text for text in unique if text not in translated], src_lang, dest_lang))
+    pending = [text for text in unique if text not in translated]
+    if progress is not None and translated:
+        progress.add("translated", sum(counts[text] for text in translated))
+
+    def checkpoint(chunk, results):
+        fresh = dict(zip(chunk, results))
+        translated.update(fresh)
+        if cache is not None:
+            cache.put_many(fresh, src_lang, dest_lang)
+        if journal is not None:
+            journal.record(fresh)
+        if progress is not None:
+            progress.add("translated", sum(counts[text] for text in chunk))
+
+    def report_error(chunk, e):
+        if progress is None:
+            return
+        for text in chunk:
+            if text in where:
+                for location in where[text]:
+                    progress.failure(location, e)
+            else:
+                progress.add("failed", counts[text])
+
+    _, errors = await translate_texts(backend, pending, src_lang, dest_lang, on_batch=checkpoint,
+                                      on_error=report_error, **options)
+
+    failures = {}
+    for start, count, e in errors:
+        for text in pending[start:start + count]:
+            failures[text] = e
+    return translated, failures
+
+
+@perf_hooks.hook()
+async def translate_workbook(wb, backend, src_lang, dest_lang, cache=None, journal=None, progress=None, **options):
+    progress = progress or ProgressReporter(mode="off")
+    cells = collect_cells(wb, progress)
+    progress.set_total(len(cells))
+    translated, failures = await translate_unique(
+        [value for _, _, value in cells], backend, src_lang, dest_lang, cache, journal,
+        progress=progress, locations=[f"{sheet_title}!{coordinate}" for sheet_title, coordinate, _ in cells], **options
+    )
+    failed = sum(1 for _, _, value in cells if value in failures)
+    return apply_translations(wb, cells, [translated.get(value) for _, _, value in cells]), failed
+
+
+def iter_windows(rows, size):
+    window = []
+    for row in rows:
+        window.append(list(row))
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+@perf_hooks.hook()
+async def translate_workbook_streaming(excel_path, save_path, backend, src_lang, dest_lang,
+                                       cache=None, journal=None, progress=None, window=STREAM_WINDOW, **options):
+    progress = progress or ProgressReporter(mode="off")
+    source = load_workbook(excel_path, read_only=True)
+    target = Workbook(write_only=True)
+    written = 0
+    failed = 0
+    try:
+        for sheet in source.worksheets:
+            out = target.create_sheet(sheet.title)
+            row_offset = 0
+            for rows in iter_windows(sheet.iter_rows(min_row=1, min_col=1, values_only=True), window):
+                cells = []
+                for r, row in enumerate(rows):
+                    for c, value in enumerate(row):
+                        kind = classify(value)
+                        if kind is None:
+                            continue
+                        progress.add("scanned")
+                        if kind == "text":
+                            cells.append((r, c, value))
+                        else:
+                            progress.add(kind)
+                locations = [f"{sheet.title}!{get_column_letter(c + 1)}{row_offset + r + 1}" for r, c, _ in cells]
+                translated, failures = await translate_unique(
+                    [value for _, _, value in cells], backend, src_lang, dest_lang, cache, journal,
+                    progress=progress, locations=locations, **options
+                )
+                for r, c, value in cells:
+                    if value in failures:
+                        failed += 1
+                        continue
+                    text = translated.get(value)
+                    if text is None:
+                        continue
+                    rows[r][c] = text
+                    written += 1
+                for row in rows:
+                    out.append(row)
+                row_offset += len(rows)
+        target.save(save_path)
+    finally:
+        source.close()
+    return written, failed
+
+
+def output_path(excel_path, output_dir=None):
+    directory, file_name = os.path.split(excel_path)
+    return os.path.join(output_dir or directory, f"translated-{file_name}")
+
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.xlsx")))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in matches:
+            if not os.path.isfile(path) or path in paths:
+                continue
+            if os.path.basename(path).startswith(("translated-", "~$")):
+                continue
+            paths.append(path)
+    return paths
+
+
+async def translate_file(excel_path, src_lang, dest_lang, output_dir=None, streaming=False, resume=False,
+                         cache_path=DEFAULT_CACHE_PATH, backend=None, rate_limiter=None,
+                         progress="auto", events_path=None, **options):
+    save_path = output_path(excel_path, output_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    backend = ManagedBackend(make_backend(backend), rate_limiter)
+    cache = TranslationCache(cache_path) if cache_path else None
+    journal = TranslationJournal(journal_path(save_path), excel_path, src_lang, dest_lang, resume=resume)
+    if journal.resumed:
+        print(f"Resuming {excel_path}: {len(journal.translations)} translations restored from the journal.")
+    reporter = ProgressReporter(os.path.basename(excel_path), progress, events_path=events_path)
+    reporter.event("start", path=excel_path, src=src_lang, dest=dest_lang, streaming=streaming)
+    started = time.perf_counter()
+    try:
+        if streaming:
+            translated, failed = await translate_workbook_streaming(
+                excel_path, save_path, backend, src_lang, dest_lang,
+                cache=cache, journal=journal, progress=reporter, **options
+            )
+        else:
+            wb = load_workbook(excel_path)
+            translated, failed = await translate_workbook(
+                wb, backend, src_lang, dest_lang, cache=cache, journal=journal, progress=reporter, **options
+            )
+            wb.save(save_path)
+        cache_stats = cache.stats() if cache is not None else {"hits": 0, "misses": 0}
+        if not failed:
+            journal.discard()
+    finally:
+        journal.close()
+        if cache is not None:
+            cache.close()
+        reporter.event("backend", backend=backend.name, calls=backend.calls, throttled=backend.throttled,
+                       **backend.histogram.summary())
+        reporter.close()
+    return {
+        "path": excel_path,
+        "save_path": save_path,
+        "translated": translated,
+        "failed": failed,
+        "metrics": reporter.metrics.counts,
+        "backend": backend.name,
+        "backend_calls": backend.calls,
+        "throttled": backend.throttled,
+        "breaker_trips": backend.breaker.trips,
+        "latency": backend.histogram,
+        "cache_hits": cache_stats["hits"],
+        "cache_misses": cache_stats["misses"],
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def _init_worker(rate_limiter):
+    global _worker_rate_limiter
+    _worker_rate_limiter = rate_limiter
+
+
+def _translate_file_worker(excel_path, src_lang, dest_lang, options):
+    try:
+        return asyncio.run(translate_file(excel_path, src_lang, dest_lang, rate_limiter=_worker_rate_limiter, **options))
+    finally:
+        perf_hooks.dump()
+
+
+def translate_files(patterns, src_lang, dest_lang, output_dir=None, workers=1, rate=None, max_rate=None, **options):
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    paths = expand_paths(patterns)
+    rate_limiter = AdaptiveRateLimiter(rate, max_rate=max_rate) if rate else None
+    options = dict(options, output_dir=output_dir)
+    results = []
+    started = time.perf_counter()
+
+    if workers > 1 and options.get("progress", "auto") == "auto":
+        options["progress"] = "log"
+
+    if workers <= 1 or len(paths) <= 1:
+        _init_worker(rate_limiter)
+        for path in paths:
+            try:
+                results.append(_translate_file_worker(path, src_lang, dest_lang, options))
+                print(f"Translated {path} -> {results[-1]['save_path']}")
+            except Exception as e:
+                results.append({"path": path, "error": str(e)})
+                print(f"Error: {path} could not be translated: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rate_limiter,)) as pool:
+            futures = {pool.submit(_translate_file_worker, path, src_lang, dest_lang, options): path for path in paths}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results.append(future.result())
+                    print(f"Translated {path} -> {results[-1]['save_path']}")
+                except Exception as e:
+                    results.append({"path": path, "error": str(e)})
+                    print(f"Error: {path} could not be translated: {e}")
+
+    print_summary(results, time.perf_counter() - started)
+    return results
+
+
+def print_summary(results, seconds):
+    done = [r for r in results if "error" not in r]
+    translated = sum(r["translated"] for r in done)
+    failed = sum(r["failed"] for r in done)
+    calls = sum(r["backend_calls"] for r in done)
+    hits = sum(r["cache_hits"] for r in done)
+    misses = sum(r["cache_misses"] for r in done)
+    rate = translated / seconds if seconds > 0 else 0.0
+    skipped_formula = sum(r["metrics"]["skipped_formula"] for r in done)
+    skipped_non_string = sum(r["metrics"]["skipped_non_string"] for r in done)
+    scanned = sum(r["metrics"]["scanned"] for r in done)
+    print(f"Files: {len(done)} translated, {len(results) - len(done)} failed in {seconds:.1f}s")
+    print(f"Cells: {scanned} scanned, {skipped_formula} formulas and {skipped_non_string} non-text skipped")
+    print(f"Cells: {translated} translated, {failed} failed ({rate:.1f} cells/s)")
+    print(f"Backend calls: {calls}, cache hits: {hits}, cache misses: {misses}")
+    latencies = {}
+    for r in done:
+        latencies.setdefault(r["backend"], LatencyHistogram()).merge(r["latency"])
+    for name, histogram in latencies.items():
+        throttled = sum(r["throttled"] for r in done if r["backend"] == name)
+        trips = sum(r["breaker_trips"] for r in done if r["backend"] == name)
+        latency = histogram.summary()
+        print(
+            f"Backend {name}: p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms, "
+            f"p99 {latency['p99_ms']:.0f} ms, {throttled} throttled, {trips} circuit breaker trips"
+        )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Translate the text cells of Excel workbooks.")
+    parser.add_argument("paths", nargs="+", help="Workbook paths, directories or glob patterns")
+    parser.add_argument("-s", "--src", default="auto", help="Source language ISO code (default: auto)")
+    parser.add_argument("-d", "--dest", required=True, help="Target language ISO code")
+    parser.add_argument("-o", "--output-dir", help="Directory for translated files (default: next to each input)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of workbooks translated in parallel")
+    parser.add_argument("-b", "--backend", choices=sorted(BACKENDS), default="google", help="Translation backend (default: google)")
+    parser.add_argument("--rate", type=float, help="Backend requests per second shared by all workers; lowered automatically when throttled")
+    parser.add_argument("--max-rate", type=float, help="Ceiling the rate may ramp up to after throttling stops (default: --rate)")
+    parser.add_argument("--streaming", action="store_true", help="Stream rows with low memory use (styles are not kept)")
+    parser.add_argument("--resume", action="store_true", help="Reuse translations journaled by an interrupted run")
+    parser.add_argument("--progress", choices=("auto", "bar", "log", "off"), default="auto", help="Progress output style (default: bar on a terminal, periodic log lines otherwise)")
+    parser.add_argument("--events", dest="events_path", help="Append JSON-lines progress and failure events to this file")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="SQLite translation cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the translation cache")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Texts sent per backend request")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="Concurrent backend requests per file")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        asyncio.run(translate_excel())
+        return 0
+    args = build_parser().parse_args(argv)
+    results = translate_files(
+        args.paths,
+        args.src,
+        args.dest,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        rate=args.rate,
+        max_rate=args.max_rate,
+        backend=args.backend,
+        streaming=args.streaming,
+        resume=args.resume,
+        progress=args.progress,
+        events_path=args.events_path,
+        cache_path=None if args.no_cache else args.cache_path,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+    )
+    if not results:
+        print("Error: no Excel files matched the given paths.")
+        return 1
+    return 1 if any("error" in r for r in results) else 0
+
 
 async def translate_excel():
     print("Welcome to the Excel Translator!")
@@ -13,31 +438,22 @@ async def translate_excel():
     dest_lang = input("Target language code: ")
 
     if os.path.isfile(excel_path):
-        wb = load_workbook(excel_path)
-        translator = Translator()
-        print("Translation is starting. Please wait...")
+        streaming = False
+        if os.path.getsize(excel_path) > STREAMING_THRESHOLD_BYTES:
+            print("This is a large file. Streaming mode uses much less memory but does not keep cell styles, merged cells or column widths.")
+            streaming = input("Use streaming mode? (y/n): ").strip().lower().startswith("y")
 
-        for sheet in wb.worksheets:
-            for row in sheet.iter_rows():
-                for cell in row:
-                    if not cell.value or not isinstance(cell.value, str):
-                        continue
-                    if cell.value.strip().startswith("="):
-                        continue
-                    try:
-                        translation = await translator.translate(cell.value, src=src_lang, dest=dest_lang)
-                        print(f"{cell.coordinate}: {cell.value} -> {translation.text}")
-                        cell.value = translation.text
-                    except Exception as e:
-                        print(f"Cell {cell.coordinate} could not be translated: {e}")
-
-        directory, file_name = os.path.split(excel_path)
-        new_file_name = f"translated-{file_name}"
-        save_path = os.path.join(directory, new_file_name)
-        wb.save(save_path)
-        print(f"Translation completed! The translated Excel file has been saved as '{save_path}'.")
+        resume = False
+        if os.path.isfile(journal_path(output_path(excel_path))):
+            print("An unfinished translation of this file was found.")
+            resume = input("Resume it? (y/n): ").strip().lower().startswith("y")
+
+        print("Translation is starting. Please wait...")
+        result = await translate_file(excel_path, src_lang, dest_lang, streaming=streaming, resume=resume)
+        print_summary([result], result["seconds"])
+        print(f"Translation completed! The translated Excel file has been saved as '{result['save_path']}'.")
     else:
         print(f"Error: The file path '{excel_path}' does not exist or is not valid.")
 
 if __name__ == "__main__":
-    asyncio.run(translate_excel())
+    sys.exit(main())
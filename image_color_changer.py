@@ -2,9 +2,23 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, colorchooser
 from PIL import Image, ImageTk
 import os
-import numpy as np
-from colorthief import ColorThief
+import time
 import customtkinter as ctk
+import color_core
+from batch_recolor import BatchRecolor
+from edit_history import EditHistory
+from image_loader import ImageLoader
+import perf_hooks
+
+RESIZE_DEBOUNCE_MS = 150
+PREVIEW_FAST_FILTER = Image.Resampling.BILINEAR
+PREVIEW_IDLE_FILTER = Image.Resampling.LANCZOS
+LIVE_PREVIEW_DELAY_MS = 15
+LIVE_PREVIEW_BUDGET = 0.03
+LIVE_PREVIEW_MIN_SCALE = 0.25
+BATCH_POLL_MS = 100
+BATCH_ERROR_LINES = 10
+LOADER_POLL_MS = 30
 
 class ImageColorChanger:
     def __init__(self, root):
@@ -21,12 +35,28 @@ class ImageColorChanger:
         self.image_path = None
         self.dominant_color = None
         self.selected_images = []
+        self.current_index = 0
+        self.loader = ImageLoader()
+        self.loader_job = None
         self.pick_color_mode = False
         self.selected_source_color = None
         self.display_scale = 1.0
         self.display_offset = (0, 0)
-        self.history = []
-        self.history_index = -1
+        self.history = None
+        self.preview_source = None
+        self.preview_pyramids = {}
+        self.preview_key = None
+        self.preview_item = None
+        self.photo = None
+        self.canvas_size = (0, 0)
+        self.resize_job = None
+        self.live_preview_active = False
+        self.live_preview_job = None
+        self.live_preview_scale = 1.0
+        self.proxy_cache = None
+        self.batch = None
+        self.batch_folder = None
+        self.recolor_rules = []
         
         self.setup_ui()
         
@@ -37,18 +67,8 @@ class ImageColorChanger:
         )
         
         if file_path:
-            try:
-                self.image_path = file_path
-                self.original_image = Image.open(file_path).convert("RGBA")
-                self.modified_image = self.original_image.copy()
-                self.history = [self.modified_image.copy()]
-                self.history_index = 0
-                self.dominant_color = self.get_dominant_color(file_path)
-                self.selected_images = [file_path]
-                self.display_image()
-                self.info_label.configure(text=f"Loaded single image: {os.path.basename(file_path)}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error while loading image: {str(e)}")
+            self.selected_images = [file_path]
+            self.show_image(0)
                 
     def load_multiple_images(self):
         file_paths = filedialog.askopenfilenames(
@@ -57,18 +77,60 @@ class ImageColorChanger:
         )
         
         if file_paths:
-            try:
-                self.selected_images = list(file_paths)
-                self.image_path = file_paths[0]
-                self.original_image = Image.open(file_paths[0]).convert("RGBA")
-                self.modified_image = self.original_image.copy()
-                self.history = [self.modified_image.copy()]
-                self.history_index = 0
-                self.dominant_color = self.get_dominant_color(file_paths[0])
-                self.display_image()
-                self.info_label.configure(text=f"{len(file_paths)} images selected. First image loaded: {os.path.basename(file_paths[0])}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error while loading images: {str(e)}")
+            self.selected_images = list(file_paths)
+            self.show_image(0)
+
+    def show_image(self, index):
+        if not self.selected_images:
+            return
+        self.current_index = max(0, min(index, len(self.selected_images) - 1))
+        image_path = self.selected_images[self.current_index]
+        entry = self.loader.request(self.selected_images, self.current_index)
+        if entry is not None:
+            self.set_image(image_path, *entry)
+        else:
+            self.info_label.configure(text=f"Loading: {os.path.basename(image_path)}")
+        self.schedule_loader_poll()
+
+    def previous_image(self):
+        if self.current_index > 0:
+            self.show_image(self.current_index - 1)
+
+    def next_image(self):
+        if self.current_index < len(self.selected_images) - 1:
+            self.show_image(self.current_index + 1)
+
+    def set_image(self, image_path, image, dominant_color):
+        self.image_path = image_path
+        self.stop_live_preview()
+        self.original_image = image
+        self.modified_image = self.original_image
+        self.history = EditHistory(self.original_image)
+        self.dominant_color = dominant_color
+        self.display_image()
+        if len(self.selected_images) > 1:
+            self.info_label.configure(text=f"Image {self.current_index + 1}/{len(self.selected_images)}: {os.path.basename(image_path)}")
+        else:
+            self.info_label.configure(text=f"Loaded single image: {os.path.basename(image_path)}")
+
+    def schedule_loader_poll(self):
+        if self.loader_job is None and self.loader.busy:
+            self.loader_job = self.root.after(LOADER_POLL_MS, self.poll_loader)
+
+    def poll_loader(self):
+        self.loader_job = None
+        for kind, path, entry, error in self.loader.poll():
+            if kind == "load":
+                if error is not None:
+                    messagebox.showerror("Error", f"Error while loading image: {str(error)}")
+                else:
+                    self.set_image(path, *entry)
+            elif error is not None:
+                messagebox.showerror("Error", f"Error while saving image: {str(error)}")
+            else:
+                self.info_label.configure(text=f"Saved: {path}")
+                messagebox.showinfo("Success", f"Image saved successfully:\n{path}")
+        self.schedule_loader_poll()
         
     def setup_ui(self):
         main_frame = ctk.CTkFrame(self.root, corner_radius=12)
@@ -117,6 +179,12 @@ class ImageColorChanger:
         ctk.CTkLabel(section_files, text="Files", font=("Segoe UI Semibold", 14)).grid(row=0, column=0, sticky="w", padx=12, pady=(12, 6))
         ctk.CTkButton(section_files, text="Select Single Image", command=self.load_single_image).grid(row=1, column=0, sticky="ew", padx=12, pady=4)
         ctk.CTkButton(section_files, text="Select Multiple Images", command=self.load_multiple_images).grid(row=2, column=0, sticky="ew", padx=12, pady=4)
+        nav_frame = ctk.CTkFrame(section_files, fg_color="transparent")
+        nav_frame.grid(row=3, column=0, sticky="ew", padx=12, pady=(4, 12))
+        nav_frame.grid_columnconfigure(0, weight=1)
+        nav_frame.grid_columnconfigure(1, weight=1)
+        ctk.CTkButton(nav_frame, text="Previous", command=self.previous_image).grid(row=0, column=0, sticky="ew", padx=(0, 6))
+        ctk.CTkButton(nav_frame, text="Next", command=self.next_image).grid(row=0, column=1, sticky="ew", padx=(6, 0))
 
         section_color = ctk.CTkFrame(parent, corner_radius=12, border_width=1, border_color="#2A2D2E")
         section_color.grid(row=1, column=0, sticky="ew", padx=12, pady=6)
@@ -146,14 +214,26 @@ class ImageColorChanger:
         ctk.CTkLabel(section_settings, text="Settings", font=("Segoe UI Semibold", 14)).grid(row=0, column=0, sticky="w", padx=12, pady=(12, 6))
         ctk.CTkLabel(section_settings, text="Color Change Strength").grid(row=1, column=0, sticky="w", padx=12)
         self.intensity_var = tk.DoubleVar(value=0.5)
-        self.intensity_slider = ctk.CTkSlider(section_settings, from_=0.0, to=1.0, number_of_steps=100, command=lambda v: self.intensity_var.set(v))
+        self.intensity_slider = ctk.CTkSlider(section_settings, from_=0.0, to=1.0, number_of_steps=100, command=lambda v: self.on_slider_change(self.intensity_var, v))
         self.intensity_slider.set(self.intensity_var.get())
         self.intensity_slider.grid(row=2, column=0, sticky="ew", padx=12, pady=(0, 8))
         ctk.CTkLabel(section_settings, text="Color Match Sensitivity").grid(row=3, column=0, sticky="w", padx=12)
         self.sensitivity_var = tk.DoubleVar(value=0.3)
-        self.sensitivity_slider = ctk.CTkSlider(section_settings, from_=0.1, to=1.0, number_of_steps=90, command=lambda v: self.sensitivity_var.set(v))
+        self.sensitivity_slider = ctk.CTkSlider(section_settings, from_=0.1, to=1.0, number_of_steps=90, command=lambda v: self.on_slider_change(self.sensitivity_var, v))
         self.sensitivity_slider.set(self.sensitivity_var.get())
-        self.sensitivity_slider.grid(row=4, column=0, sticky="ew", padx=12, pady=(0, 12))
+        self.sensitivity_slider.grid(row=4, column=0, sticky="ew", padx=12, pady=(0, 8))
+        rules_frame = ctk.CTkFrame(section_settings, fg_color="transparent")
+        ctk.CTkLabel(section_settings, text="Color Match Space").grid(row=5, column=0, sticky="w", padx=12)
+        self.space_var = tk.StringVar(value="RGB")
+        ctk.CTkSegmentedButton(section_settings, values=["RGB", "Lab", "HSV"], variable=self.space_var,
+                               command=lambda _: self.schedule_live_preview()).grid(row=6, column=0, sticky="ew", padx=12, pady=(0, 8))
+        rules_frame.grid(row=7, column=0, sticky="ew", padx=12, pady=(0, 4))
+        rules_frame.grid_columnconfigure(0, weight=1)
+        rules_frame.grid_columnconfigure(1, weight=1)
+        ctk.CTkButton(rules_frame, text="Add Rule", command=self.add_rule).grid(row=0, column=0, sticky="ew", padx=(0, 6))
+        ctk.CTkButton(rules_frame, text="Clear Rules", command=self.clear_rules).grid(row=0, column=1, sticky="ew", padx=(6, 0))
+        self.rules_label = ctk.CTkLabel(section_settings, text="No extra rules", wraplength=300, justify="left")
+        self.rules_label.grid(row=8, column=0, sticky="w", padx=12, pady=(0, 12))
 
         section_history = ctk.CTkFrame(parent, corner_radius=12, border_width=1, border_color="#2A2D2E")
         section_history.grid(row=3, column=0, sticky="ew", padx=12, pady=6)
@@ -171,7 +251,11 @@ class ImageColorChanger:
         ctk.CTkButton(section_actions, text="Apply Color", command=self.change_color).grid(row=1, column=0, columnspan=2, sticky="ew", padx=12, pady=4)
         ctk.CTkButton(section_actions, text="Reset", command=self.reset_image).grid(row=2, column=0, sticky="ew", padx=12, pady=4)
         ctk.CTkButton(section_actions, text="Save", command=self.save_image).grid(row=2, column=1, sticky="ew", padx=12, pady=4)
-        ctk.CTkButton(section_actions, text="Batch Save", command=self.save_all_images).grid(row=3, column=0, columnspan=2, sticky="ew", padx=12, pady=(4, 12))
+        ctk.CTkLabel(section_actions, text="Output Format").grid(row=3, column=0, sticky="w", padx=12, pady=4)
+        self.profile_var = tk.StringVar(value=color_core.DEFAULT_PROFILE)
+        ctk.CTkOptionMenu(section_actions, values=list(color_core.OUTPUT_PROFILES), variable=self.profile_var).grid(row=3, column=1, sticky="ew", padx=12, pady=4)
+        ctk.CTkButton(section_actions, text="Batch Save", command=self.save_all_images).grid(row=4, column=0, sticky="ew", padx=12, pady=(4, 12))
+        ctk.CTkButton(section_actions, text="Cancel Batch", command=self.cancel_batch).grid(row=4, column=1, sticky="ew", padx=12, pady=(4, 12))
 
         section_info = ctk.CTkFrame(parent, corner_radius=12, border_width=1, border_color="#2A2D2E")
         section_info.grid(row=5, column=0, sticky="ew", padx=12, pady=(6, 12))
@@ -185,6 +269,8 @@ class ImageColorChanger:
     def draw_placeholder(self):
         try:
             self.canvas.delete("all")
+            self.preview_item = None
+            self.preview_key = None
             w = self.canvas.winfo_width()
             h = self.canvas.winfo_height()
             if w < 2 or h < 2:
@@ -206,71 +292,190 @@ class ImageColorChanger:
         except Exception:
             pass
 
-    def push_history(self):
-        try:
-            if self.modified_image is None:
-                return
-            if self.history_index < len(self.history) - 1:
-                self.history = self.history[: self.history_index + 1]
-            self.history.append(self.modified_image.copy())
-            self.history_index += 1
-        except Exception:
-            pass
+    def push_history(self, op):
+        if self.history is not None and self.modified_image is not None:
+            self.history.record(op, self.modified_image)
 
     def undo(self):
-        if self.history_index <= 0:
+        if self.history is None or not self.history.can_undo():
             return
-        self.history_index -= 1
-        self.modified_image = self.history[self.history_index].copy()
+        self.stop_live_preview()
+        self.modified_image = self.history.undo()
         self.display_image()
         self.info_label.configure(text="Geri alındı")
 
     def redo(self):
-        if self.history_index >= len(self.history) - 1:
+        if self.history is None or not self.history.can_redo():
             return
-        self.history_index += 1
-        self.modified_image = self.history[self.history_index].copy()
+        self.stop_live_preview()
+        self.modified_image = self.history.redo()
         self.display_image()
         self.info_label.configure(text="İleri alındı")
 
                 
-    def get_dominant_color(self, image_path):
-        try:
-            color_thief = ColorThief(image_path)
-            dominant_color = color_thief.get_color(quality=1)
-            return dominant_color
-        except:
-            return (128, 128, 128)
+    def get_dominant_color(self, image_path, image=None):
+        return color_core.get_dominant_color(image_path, image)
             
-    def display_image(self):
+    def get_preview_level(self, image, width, height):
+        entry = self.preview_pyramids.get(id(image))
+        if entry is None or entry[0] is not image:
+            self.preview_pyramids = {
+                key: value for key, value in self.preview_pyramids.items()
+                if value[0] is self.original_image or value[0] is self.modified_image
+            }
+            entry = (image, [image])
+            self.preview_pyramids[id(image)] = entry
+        pyramid = entry[1]
+        level = pyramid[-1]
+        while level.width // 2 >= width and level.height // 2 >= height:
+            level = level.reduce(2)
+            pyramid.append(level)
+        for candidate in reversed(pyramid):
+            if candidate.width >= width and candidate.height >= height:
+                return candidate
+        return pyramid[0]
+
+    def downscale(self, image, width, height, resample):
+        level = self.get_preview_level(image, width, height)
+        if level.size == (width, height):
+            return level
+        return level.resize((width, height), resample)
+
+    def current_source_color(self):
+        if self.selected_source_color is not None and self.color_var.get().strip() != "":
+            return self.selected_source_color
+        return self.dominant_color
+
+    def get_live_preview_params(self):
+        try:
+            target_color = self.parse_color_input(self.color_var.get())
+        except Exception:
+            return None
+        return (target_color, round(self.intensity_var.get(), 4), round(self.sensitivity_var.get(), 4), self.current_source_color(), tuple(self.recolor_rules), self.current_space())
+
+    def current_space(self):
+        return self.space_var.get().lower()
+
+    def add_rule(self):
+        params = self.get_live_preview_params()
+        if params is None:
+            messagebox.showwarning("Uyarı", "Geçersiz renk kodu")
+            return
+        target_color, intensity, sensitivity, source_color = params[:4]
+        if source_color is None:
+            messagebox.showwarning("Uyarı", "Önce bir görsel seçin")
+            return
+        self.recolor_rules.append((source_color, target_color, intensity, sensitivity))
+        self.update_rules_label()
+        self.schedule_live_preview()
+
+    def clear_rules(self):
+        self.recolor_rules = []
+        self.update_rules_label()
+        self.schedule_live_preview()
+
+    def update_rules_label(self):
+        if not self.recolor_rules:
+            self.rules_label.configure(text="No extra rules")
+            return
+        lines = [f"{self.rgb_to_hex(source).upper()} -> {self.rgb_to_hex(target).upper()}" for source, target, _, _ in self.recolor_rules]
+        self.rules_label.configure(text=f"{len(lines)} extra rules:\n" + "\n".join(lines))
+
+    def recolor(self, image, params):
+        target_color, intensity, sensitivity, source_color, rules, space = params
+        if not rules:
+            return self.apply_color_change(image, target_color, intensity, sensitivity, source_color, space)
+        source = source_color if source_color is not None else self.dominant_color
+        return color_core.apply_rules(image, list(rules) + [(source, target_color, intensity, sensitivity)], space)
+
+    def render_live_preview(self, params, width, height):
+        proxy_width = max(1, int(width * self.live_preview_scale))
+        proxy_height = max(1, int(height * self.live_preview_scale))
+        if self.proxy_cache is None or self.proxy_cache[0] is not self.original_image or self.proxy_cache[1] != (proxy_width, proxy_height):
+            proxy = self.downscale(self.original_image, proxy_width, proxy_height, PREVIEW_FAST_FILTER)
+            self.proxy_cache = (self.original_image, (proxy_width, proxy_height), proxy)
+        proxy = self.proxy_cache[2]
+
+        started = time.perf_counter()
+        preview = self.recolor(proxy, params)
+        elapsed = time.perf_counter() - started
+        if elapsed > LIVE_PREVIEW_BUDGET:
+            self.live_preview_scale = max(LIVE_PREVIEW_MIN_SCALE, self.live_preview_scale * 0.7)
+        elif elapsed < LIVE_PREVIEW_BUDGET / 2:
+            self.live_preview_scale = min(1.0, self.live_preview_scale * 1.25)
+
+        if preview.size != (width, height):
+            preview = preview.resize((width, height), PREVIEW_FAST_FILTER)
+        return preview
+
+    def on_slider_change(self, var, value):
+        var.set(value)
+        self.schedule_live_preview()
+
+    def schedule_live_preview(self):
+        if self.original_image is None:
+            return
+        if self.live_preview_job is not None:
+            self.root.after_cancel(self.live_preview_job)
+        self.live_preview_job = self.root.after(LIVE_PREVIEW_DELAY_MS, self.update_live_preview)
+
+    def update_live_preview(self):
+        self.live_preview_job = None
+        if self.original_image is None or self.get_live_preview_params() is None:
+            return
+        self.live_preview_active = True
+        self.display_image()
+        self.info_label.configure(text="Preview - click Apply Color to apply it to the full image")
+
+    def stop_live_preview(self):
+        self.live_preview_active = False
+        if self.live_preview_job is not None:
+            self.root.after_cancel(self.live_preview_job)
+            self.live_preview_job = None
+
+    @perf_hooks.hook()
+    def display_image(self, fast=False):
         if self.modified_image:
-            self.canvas.delete("all")
-            
-            display_image = self.modified_image.copy()
-            
             canvas_width = self.canvas.winfo_width()
             canvas_height = self.canvas.winfo_height()
             
             if canvas_width > 1 and canvas_height > 1:
-                img_width, img_height = display_image.size
+                source = self.original_image if self.live_preview_active else self.modified_image
+                img_width, img_height = source.size
                 
                 scale_x = canvas_width / img_width
                 scale_y = canvas_height / img_height
                 scale = min(scale_x, scale_y, 1.0)
                 
-                new_width = int(img_width * scale)
-                new_height = int(img_height * scale)
-                
-                display_image = display_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                self.photo = ImageTk.PhotoImage(display_image)
-                
+                new_width = max(1, int(img_width * scale))
+                new_height = max(1, int(img_height * scale))
                 x = (canvas_width - new_width) // 2
                 y = (canvas_height - new_height) // 2
                 self.display_scale = scale
                 self.display_offset = (x, y)
-                
-                self.canvas.create_image(x, y, anchor=tk.NW, image=self.photo)
+
+                params = self.get_live_preview_params() if self.live_preview_active else None
+                resample = PREVIEW_FAST_FILTER if fast else PREVIEW_IDLE_FILTER
+                key = (new_width, new_height, resample, params)
+                if self.preview_source is source and self.preview_key == key and self.preview_item is not None:
+                    self.canvas.coords(self.preview_item, x, y)
+                    self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+                    return
+
+                if params is not None:
+                    display_image = self.render_live_preview(params, new_width, new_height)
+                else:
+                    display_image = self.downscale(source, new_width, new_height, resample)
+
+                if self.photo is not None and self.preview_item is not None and (self.photo.width(), self.photo.height()) == (new_width, new_height):
+                    self.photo.paste(display_image)
+                    self.canvas.coords(self.preview_item, x, y)
+                else:
+                    self.canvas.delete("all")
+                    self.photo = ImageTk.PhotoImage(display_image)
+                    self.preview_item = self.canvas.create_image(x, y, anchor=tk.NW, image=self.photo)
+                self.preview_source = source
+                self.preview_key = key
                 self.canvas.configure(scrollregion=self.canvas.bbox("all"))
                 
     def choose_color(self):
@@ -305,14 +510,14 @@ class ImageColorChanger:
         window.destroy()
         
     def hex_to_rgb(self, hex_color):
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        return color_core.hex_to_rgb(hex_color)
         
     def on_color_var_change(self):
         try:
             rgb = self.parse_color_input(self.color_var.get())
             hex_val = self.rgb_to_hex(rgb).upper()
             self.color_button.configure(bg=hex_val)
+            self.schedule_live_preview()
         except Exception:
             pass
 
@@ -338,33 +543,13 @@ class ImageColorChanger:
             self.source_color_button.configure(fg_color=hex_val)
             self.pick_color_mode = False
             self.pick_color_btn.configure(text="Görselden Renk Seç")
+            self.schedule_live_preview()
 
     def parse_color_input(self, color_text):
-        text = color_text.strip()
-        if text.startswith('#'):
-            text = text.upper()
-            if len(text) == 7:
-                return self.hex_to_rgb(text)
-            if len(text) == 4:
-                r = text[1]*2
-                g = text[2]*2
-                b = text[3]*2
-                return self.hex_to_rgb('#' + r + g + b)
-        if len(text) in (3, 6) and all(c in '0123456789ABCDEFabcdef' for c in text):
-            return self.hex_to_rgb('#' + text.upper())
-        if ',' in text or ' ' in text:
-            sep = ',' if ',' in text else ' '
-            parts = [p for p in text.split(sep) if p]
-            if len(parts) == 3:
-                r, g, b = [int(float(p)) for p in parts]
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return (r, g, b)
-        raise ValueError("Geçersiz renk kodu")
+        return color_core.parse_color_input(color_text)
 
     def rgb_to_hex(self, rgb_color):
-        return '#{:02x}{:02x}{:02x}'.format(*rgb_color)
+        return color_core.rgb_to_hex(rgb_color)
         
     def change_color(self):
         if self.modified_image is None:
@@ -375,18 +560,19 @@ class ImageColorChanger:
             target_color = self.parse_color_input(self.color_var.get())
             intensity = self.intensity_var.get()
             sensitivity = self.sensitivity_var.get()
-            src_dom = None
-            if self.selected_source_color is not None and self.color_var.get().strip() != "":
-                src_dom = self.selected_source_color
+            source_color = self.current_source_color()
+            rules = list(self.recolor_rules)
+            space = self.current_space()
             
-            self.push_history()
-            self.modified_image = self.apply_color_change(
-                self.original_image.copy(),
-                target_color,
-                intensity,
-                sensitivity,
-                src_dom if src_dom is not None else self.dominant_color
+            self.stop_live_preview()
+            self.modified_image = self.recolor(
+                self.original_image,
+                (target_color, intensity, sensitivity, source_color, rules, space)
             )
+            if rules:
+                self.push_history(("rules", rules + [(source_color, target_color, intensity, sensitivity)], space))
+            else:
+                self.push_history(("recolor", target_color, intensity, sensitivity, source_color, space))
             
             self.display_image()
             self.info_label.configure(text="Color applied")
@@ -394,34 +580,15 @@ class ImageColorChanger:
         except Exception as e:
             messagebox.showerror("Error", f"Error while applying color: {str(e)}")
             
-    def apply_color_change(self, image, target_color, intensity, sensitivity, source_dominant_color=None):
-        img_array = np.array(image)
-        if len(img_array.shape) != 3 or img_array.shape[2] != 4:
-            return image
-        rgb_array = img_array[:, :, :3].astype(np.float32)
-        alpha_array = img_array[:, :, 3].astype(np.float32)
-        target_rgb = np.array(target_color, dtype=np.float32)
-        dominant = np.array(source_dominant_color if source_dominant_color is not None else self.dominant_color, dtype=np.float32)
-        if dominant is None:
-            return image
-        diff = rgb_array - dominant
-        dist = np.sqrt(np.sum(np.square(diff), axis=2))
-        thresh = sensitivity * 255.0
-        mask = (alpha_array > 0) & (dist < thresh)
-        with np.errstate(divide='ignore', invalid='ignore'):
-            factor = intensity * (1.0 - (dist / thresh))
-        factor = np.clip(factor, 0.0, 1.0)
-        factor3 = np.repeat(factor[:, :, np.newaxis], 3, axis=2)
-        blend = rgb_array * (1.0 - factor3) + target_rgb * factor3
-        rgb_array[mask] = blend[mask]
-        rgb_array = np.clip(rgb_array, 0, 255).astype(np.uint8)
-        result_array = np.dstack((rgb_array, alpha_array.astype(np.uint8)))
-        return Image.fromarray(result_array)
+    def apply_color_change(self, image, target_color, intensity, sensitivity, source_dominant_color=None, space="rgb"):
+        source = source_dominant_color if source_dominant_color is not None else self.dominant_color
+        return color_core.apply_color_change(image, target_color, intensity, sensitivity, source, space)
         
     def reset_image(self):
         if self.original_image:
-            self.push_history()
-            self.modified_image = self.original_image.copy()
+            self.stop_live_preview()
+            self.modified_image = self.original_image
+            self.push_history(("original",))
             self.display_image()
             self.info_label.configure(text="Görsel sıfırlandı")
             
@@ -433,28 +600,16 @@ class ImageColorChanger:
         if not self.image_path:
             messagebox.showwarning("Warning", "Please select an image first")
             return
+
+        if self.live_preview_active:
+            self.change_color()
             
         try:
-            from datetime import datetime
-            import os
-            
-            original_dir = os.path.dirname(self.image_path)
-            original_filename = os.path.splitext(os.path.basename(self.image_path))[0]
-            color_code = self.rgb_to_hex(self.parse_color_input(self.color_var.get())).replace("#", "").upper()
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            folder_name = f"{color_code} - {current_date}"
-            save_dir = os.path.join(original_dir, folder_name)
-            
-            if not os.path.exists(save_dir):
-                os.makedirs(save_dir)
-            
-            new_filename = f"{original_filename}_renkli.png"
-            save_path = os.path.join(save_dir, new_filename)
-            
-            self.push_history()
-            self.modified_image.save(save_path, "PNG")
-            messagebox.showinfo("Success", f"Image saved successfully:\n{save_path}")
-            self.info_label.configure(text=f"Saved: {save_path}")
+            profile = self.profile_var.get()
+            save_path = color_core.output_path(self.image_path, self.parse_color_input(self.color_var.get()), profile=profile)
+            self.loader.save(self.modified_image, save_path, profile)
+            self.info_label.configure(text=f"Saving: {save_path}")
+            self.schedule_loader_poll()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error while saving image: {str(e)}")
@@ -463,68 +618,93 @@ class ImageColorChanger:
         if not self.selected_images:
             messagebox.showwarning("Warning", "No images to save")
             return
+
+        if self.batch is not None and not self.batch.done:
+            messagebox.showwarning("Warning", "A batch save is already running")
+            return
             
         try:
-            from datetime import datetime
-            import os
-            
-            color_code = self.rgb_to_hex(self.parse_color_input(self.color_var.get())).replace("#", "").upper()
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            folder_name = f"{color_code} - {current_date}"
-            
-            saved_count = 0
-            error_count = 0
+            target_color = self.parse_color_input(self.color_var.get())
+            folder_name = color_core.output_folder_name(target_color)
+            source_color = self.selected_source_color if (self.selected_source_color is not None and self.color_var.get().strip() != "") else None
             
-            for image_path in self.selected_images:
-                try:
-                    original_dir = os.path.dirname(image_path)
-                    original_filename = os.path.splitext(os.path.basename(image_path))[0]
-                    
-                    save_dir = os.path.join(original_dir, folder_name)
-                    
-                    if not os.path.exists(save_dir):
-                        os.makedirs(save_dir)
-                    
-                    original_img = Image.open(image_path).convert("RGBA")
-                    dom = self.selected_source_color if (self.selected_source_color is not None and self.color_var.get().strip() != "") else self.get_dominant_color(image_path)
-                    modified_img = self.apply_color_change(
-                        original_img.copy(),
-                        self.parse_color_input(self.color_var.get()),
-                        self.intensity_var.get(),
-                        self.sensitivity_var.get(),
-                        dom
-                    )
-                    
-                    new_filename = f"{original_filename}_renkli.png"
-                    save_path = os.path.join(save_dir, new_filename)
-                    
-                    modified_img.save(save_path, "PNG")
-                    saved_count += 1
-                    
-                except Exception as e:
-                    error_count += 1
-                    print(f"Error: {image_path} - {str(e)}")
+            profile = self.profile_var.get()
+            tasks = [(image_path, color_core.output_path(image_path, target_color, profile=profile)) for image_path in self.selected_images]
             
-            if error_count == 0:
-                messagebox.showinfo("Success", f"{saved_count} images saved successfully:\n{save_dir}")
-            else:
-                messagebox.showwarning("Partial Success", f"{saved_count} images saved, {error_count} errors")
-            self.info_label.configure(text=f"Batch save done: {saved_count} OK, {error_count} Errors")
+            self.batch = BatchRecolor(
+                tasks,
+                target_color,
+                self.intensity_var.get(),
+                self.sensitivity_var.get(),
+                source_color,
+                rules=self.recolor_rules,
+                space=self.current_space(),
+                profile=profile
+            ).start()
+            self.batch_folder = folder_name
+            self.info_label.configure(text=f"Batch save started: 0/{self.batch.total}")
+            self.root.after(BATCH_POLL_MS, self.poll_batch)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error during batch save: {str(e)}")
+
+    def poll_batch(self):
+        batch = self.batch
+        if batch is None:
+            return
+        batch.poll()
+        if not batch.done:
+            self.info_label.configure(text=f"Batch save: {batch.completed}/{batch.total} done, {len(batch.errors)} errors")
+            self.root.after(BATCH_POLL_MS, self.poll_batch)
+            return
+
+        summary = batch.summary()
+        for image_path, error in batch.errors:
+            print(f"Error: {image_path} - {error}")
+        if summary["cancelled"]:
+            messagebox.showinfo("Cancelled", f"{summary['saved']} images saved, {summary['errors']} errors, {summary['cancelled']} cancelled")
+        elif summary["errors"] == 0:
+            messagebox.showinfo("Success", f"{summary['saved']} images saved, {summary['skipped']} unchanged skipped:\n{self.batch_folder}")
+        else:
+            lines = [f"{os.path.basename(path)}: {error}" for path, error in batch.errors[:BATCH_ERROR_LINES]]
+            if len(batch.errors) > BATCH_ERROR_LINES:
+                lines.append(f"... and {len(batch.errors) - BATCH_ERROR_LINES} more")
+            messagebox.showwarning("Partial Success", f"{summary['saved']} images saved, {summary['errors']} errors\n\n" + "\n".join(lines))
+        self.info_label.configure(text=f"Batch save done: {summary['saved']} OK, {summary['skipped']} skipped, {summary['errors']} Errors in {summary['seconds']:.1f}s")
+
+    def cancel_batch(self):
+        if self.batch is None or self.batch.done:
+            return
+        self.batch.cancel()
+        self.info_label.configure(text="Cancelling batch save...")
                 
     def on_canvas_configure(self, event):
+        size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        if size == self.canvas_size:
+            return
+        self.canvas_size = size
         if self.modified_image is None:
             self.draw_placeholder()
-        else:
-            self.display_image()
+            return
+        self.display_image(fast=True)
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(RESIZE_DEBOUNCE_MS, self.on_resize_idle)
+
+    def on_resize_idle(self):
+        self.resize_job = None
+        self.display_image()
+
+    def on_close(self):
+        self.loader.shutdown()
+        self.root.destroy()
 
 def main():
     root = tk.Tk()
     app = ImageColorChanger(root)
     
     root.bind("<Configure>", lambda e: app.on_canvas_configure(e))
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
     
     root.mainloop()
 
@@ -0,0 +1,109 @@
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+import color_core
+
+LOADER_WORKERS = 2
+PREFETCH_AHEAD = 2
+PREFETCH_BEHIND = 1
+DECODED_CACHE_SIZE = PREFETCH_AHEAD + PREFETCH_BEHIND + 2
+
+
+def decode_image(image_path):
+    with Image.open(image_path) as image:
+        rgba = image.convert("RGBA")
+    return rgba, color_core.get_dominant_color(image_path, rgba)
+
+
+def encode_image(image, save_path, profile=color_core.DEFAULT_PROFILE):
+    return color_core.save_image(image, save_path, profile)
+
+
+def prefetch_window(paths, index, ahead=PREFETCH_AHEAD, behind=PREFETCH_BEHIND):
+    return list(paths[index + 1:index + 1 + ahead]) + list(paths[max(0, index - behind):index])
+
+
+class ImageLoader:
+    def __init__(self, workers=LOADER_WORKERS, cache_size=DECODED_CACHE_SIZE):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-load")
+        self.saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-save")
+        self.events = queue.Queue()
+        self.cache_size = max(1, cache_size)
+        self.decoded = OrderedDict()
+        self.loads = {}
+        self.saves = {}
+        self.wanted = None
+        self.keep = set()
+
+    @property
+    def busy(self):
+        return bool(self.loads or self.saves)
+
+    def cached(self, image_path):
+        entry = self.decoded.get(image_path)
+        if entry is not None:
+            self.decoded.move_to_end(image_path)
+        return entry
+
+    def store(self, image_path, entry):
+        self.decoded[image_path] = entry
+        self.decoded.move_to_end(image_path)
+        while len(self.decoded) > self.cache_size:
+            self.decoded.popitem(last=False)
+
+    def submit_load(self, image_path):
+        if image_path in self.decoded or image_path in self.loads:
+            return
+        future = self.executor.submit(decode_image, image_path)
+        self.loads[image_path] = future
+        future.add_done_callback(lambda f, path=image_path: self.events.put(("load", path, f)))
+
+    def request(self, paths, index):
+        image_path = paths[index]
+        neighbours = prefetch_window(paths, index)
+        self.keep = {image_path, *neighbours}
+        for path, future in list(self.loads.items()):
+            if path not in self.keep and future.cancel():
+                del self.loads[path]
+        entry = self.cached(image_path)
+        self.wanted = image_path if entry is None else None
+        self.submit_load(image_path)
+        for path in neighbours:
+            self.submit_load(path)
+        return entry
+
+    def save(self, image, save_path, profile=color_core.DEFAULT_PROFILE):
+        future = self.saver.submit(encode_image, image, save_path, profile)
+        self.saves[future] = save_path
+        future.add_done_callback(lambda f: self.events.put(("save", None, f)))
+        return future
+
+    def poll(self):
+        finished = []
+        while True:
+            try:
+                kind, image_path, future = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "save":
+                save_path = self.saves.pop(future)
+                error = future.exception()
+                finished.append(("save", future.result() if error is None else save_path, None, error))
+                continue
+            if self.loads.get(image_path) is not future:
+                continue
+            del self.loads[image_path]
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is None and image_path in self.keep:
+                self.store(image_path, future.result())
+            if image_path == self.wanted:
+                self.wanted = None
+                finished.append(("load", image_path, future.result() if error is None else None, error))
+        return finished
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.saver.shutdown(wait=False)
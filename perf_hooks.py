@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import atexit
+import cProfile
+import functools
+import inspect
+import threading
+import tracemalloc
+
+PROFILE_ENV = "TOOLS_PROFILE"
+PROFILE_DIR_ENV = "TOOLS_PROFILE_DIR"
+PROFILE_MODES = ("cprofile", "tracemalloc")
+DEFAULT_PROFILE_DIR = "profiles"
+TOP_ALLOCATIONS = 25
+
+_mode = None
+_output_dir = DEFAULT_PROFILE_DIR
+_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_local = threading.local()
+_profiles = {}
+_stats = {}
+_registered = False
+
+
+def enable(mode, output_dir=DEFAULT_PROFILE_DIR):
+    global _mode, _output_dir, _registered
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode} (expected one of {', '.join(PROFILE_MODES)})")
+    _mode = mode
+    _output_dir = output_dir
+    os.environ[PROFILE_ENV] = mode
+    os.environ[PROFILE_DIR_ENV] = output_dir
+    if mode == "tracemalloc" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if not _registered:
+        atexit.register(dump)
+        _registered = True
+
+
+def disable():
+    global _mode
+    paths = dump()
+    _mode = None
+    os.environ.pop(PROFILE_ENV, None)
+    os.environ.pop(PROFILE_DIR_ENV, None)
+    return paths
+
+
+def enabled():
+    return _mode is not None
+
+
+def _reset_after_fork():
+    global _lock, _stats_lock, _local, _profiles, _stats
+    _lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _local = threading.local()
+    _profiles = {}
+    _stats = {}
+
+
+def start(name):
+    if _mode is None:
+        return None
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    mode = None
+    baseline = 0
+    if depth == 0 and _lock.acquire(blocking=False):
+        mode = _mode
+        if mode == "cprofile":
+            _profiles.setdefault(name, cProfile.Profile()).enable()
+        else:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+    return name, mode, baseline, time.perf_counter()
+
+
+def stop(token):
+    if token is None:
+        return
+    name, mode, baseline, started = token
+    seconds = time.perf_counter() - started
+    _local.depth -= 1
+    peak = 0
+    if mode is not None:
+        if mode == "cprofile":
+            _profiles[name].disable()
+        elif tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        _lock.release()
+    with _stats_lock:
+        stats = _stats.setdefault(name, {"calls": 0, "captured": 0, "seconds": 0.0, "max_seconds": 0.0, "peak_bytes": 0})
+        stats["calls"] += 1
+        stats["captured"] += mode is not None
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["peak_bytes"] = max(stats["peak_bytes"], peak)
+
+
+def hook(name=None):
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token = start(label)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    stop(token)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = start(label)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stop(token)
+        return wrapper
+    return decorate
+
+
+def stats():
+    with _stats_lock:
+        return {name: dict(values) for name, values in _stats.items()}
+
+
+def dump():
+    if _mode is None or not _stats:
+        return []
+    os.makedirs(_output_dir, exist_ok=True)
+    pid = os.getpid()
+    paths = []
+    for name, profile in list(_profiles.items()):
+        path = os.path.join(_output_dir, f"{name}.{pid}.prof")
+        profile.dump_stats(path)
+        paths.append(path)
+    report = {"mode": _mode, "pid": pid, "hooks": stats()}
+    if _mode == "tracemalloc" and tracemalloc.is_tracing():
+        report["top_allocations"] = [
+            {"location": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+            for stat in tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+        ]
+    path = os.path.join(_output_dir, f"hooks.{pid}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    paths.append(path)
+    return paths
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+if os.environ.get(PROFILE_ENV):
+    if os.environ[PROFILE_ENV] in PROFILE_MODES:
+        enable(os.environ[PROFILE_ENV], os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR))
+    else:
+        print(f"Warning: ignoring {PROFILE_ENV}={os.environ[PROFILE_ENV]} (expected one of {', '.join(PROFILE_MODES)}), "
+              "profiling stays off", file=sys.stderr)
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import argparse
+import color_core
+from recolor_manifest import ManifestSet, params_key
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Recolor images without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="Image paths, directories or glob patterns")
+    parser.add_argument("-t", "--target", required=True, help="Target color (#RRGGBB, #RGB or 'R,G,B')")
+    parser.add_argument("-s", "--source", help="Source color to replace (default: each image's dominant color)")
+    parser.add_argument("-i", "--intensity", type=float, default=0.5, help="Color change strength 0-1 (default: 0.5)")
+    parser.add_argument("-m", "--sensitivity", type=float, default=0.3, help="Color match sensitivity 0.1-1 (default: 0.3)")
+    parser.add_argument("--space", choices=color_core.MATCH_SPACES, default="rgb",
+                        help="Color matching space: RGB distance, CIELAB delta E or HSV hue (default: rgb)")
+    parser.add_argument("-r", "--rule", action="append", default=[], metavar="SOURCE:TARGET[:INTENSITY[:SENSITIVITY]]",
+                        help="Extra source->target rule applied in the same pass; repeatable (intensity/sensitivity default to -i/-m)")
+    parser.add_argument("-o", "--output-dir", help="Output directory (default: '<COLOR> - <date>' next to each input)")
+    parser.add_argument("--suffix", default=color_core.OUTPUT_SUFFIX, help=f"Output file name suffix (default: {color_core.OUTPUT_SUFFIX})")
+    parser.add_argument("-f", "--format", choices=list(color_core.OUTPUT_PROFILES), default=color_core.DEFAULT_PROFILE,
+                        help="Output profile: PNG compression level, lossless WebP or JPEG for opaque images (default: png)")
+    parser.add_argument("--no-lut", action="store_true",
+                        help=f"Disable the cached color lookup table, used when --source is given and the inputs total at least "
+                             f"{color_core.LUT_MIN_PIXELS // 1_000_000} MP. Each table is a {color_core.LUT_BYTES >> 20} MB file in "
+                             f"{color_core.LUT_DIR}; up to {color_core.LUT_DISK_ENTRIES} are kept")
+    parser.add_argument("--force", action="store_true", help="Recolor every input even if the output folder's manifest says it is up to date")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Parallel worker processes (default: CPU count)")
+    return parser
+
+
+def parse_rule(text, intensity, sensitivity):
+    parts = text.split(":")
+    if len(parts) < 2 or len(parts) > 4:
+        raise ValueError(f"Invalid rule: {text}")
+    source = color_core.parse_color_input(parts[0])
+    target = color_core.parse_color_input(parts[1])
+    if len(parts) > 2:
+        intensity = float(parts[2])
+    if len(parts) > 3:
+        sensitivity = float(parts[3])
+    return (source, target, intensity, sensitivity)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        target_color = color_core.parse_color_input(args.target)
+        source_color = color_core.parse_color_input(args.source) if args.source else None
+        rules = [parse_rule(rule, args.intensity, args.sensitivity) for rule in args.rule]
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    paths = color_core.expand_inputs(args.inputs)
+    if not paths:
+        print("Error: no images matched the given inputs.", file=sys.stderr)
+        return 1
+    use_lut = source_color is not None and not args.no_lut and color_core.lut_pays_off(paths)
+    tasks = [(path, color_core.output_path(path, target_color, args.output_dir, args.suffix, profile=args.format)) for path in paths]
+    started = time.perf_counter()
+    errors = []
+    skipped = 0
+
+    if args.workers <= 1 or len(tasks) == 1:
+        from batch_recolor import recolor_task
+
+        manifests = None if args.force else ManifestSet(
+            params_key(target_color, args.intensity, args.sensitivity, source_color, rules, args.space, args.format, args.suffix))
+        for image_path, save_path in tasks:
+            if manifests is not None and manifests.lookup(image_path, save_path) is not None:
+                skipped += 1
+                continue
+            try:
+                result = recolor_task(image_path, save_path, target_color, args.intensity, args.sensitivity, source_color,
+                                      rules, use_lut=use_lut, space=args.space, profile=args.format,
+                                      incremental=manifests is not None)
+                if manifests is not None:
+                    manifests.record(image_path, result)
+                print(f"Saved: {result['save_path']}")
+            except Exception as e:
+                errors.append((image_path, str(e)))
+        if manifests is not None:
+            manifests.save()
+    else:
+        from batch_recolor import BatchRecolor
+
+        batch = BatchRecolor(tasks, target_color, args.intensity, args.sensitivity, source_color, workers=args.workers, rules=rules, use_lut=use_lut, space=args.space,
+                             profile=args.format, incremental=not args.force, suffix=args.suffix)
+        batch.start()
+        try:
+            batch.wait(on_progress=lambda b: print(f"{b.completed}/{b.total} done, {len(b.errors)} errors"))
+        except KeyboardInterrupt:
+            batch.cancel()
+            batch.wait()
+        errors = batch.errors
+        skipped = len(batch.skipped)
+
+    for image_path, error in errors:
+        print(f"Error: {image_path} - {error}", file=sys.stderr)
+    seconds = time.perf_counter() - started
+    print(f"{len(tasks) - len(errors) - skipped} images saved, {skipped} unchanged skipped, {len(errors)} errors in {seconds:.1f}s")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
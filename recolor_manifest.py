@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import color_core
+
+MANIFEST_NAME = ".recolor_manifest.json"
+MANIFEST_VERSION = 1
+FALLBACK_EXTENSIONS = {color_core.OUTPUT_PROFILES[spec["fallback"]]["extension"]
+                       for spec in color_core.OUTPUT_PROFILES.values() if "fallback" in spec} | {".png"}
+
+
+def manifest_path(output_dir):
+    return os.path.join(output_dir, MANIFEST_NAME)
+
+
+def params_key(target_color, intensity, sensitivity, source_color=None, rules=(), space="rgb",
+               profile=color_core.DEFAULT_PROFILE, suffix=color_core.OUTPUT_SUFFIX):
+    normalized = {
+        "version": MANIFEST_VERSION,
+        "target": list(map(int, target_color)),
+        "intensity": float(intensity),
+        "sensitivity": float(sensitivity),
+        "source": list(map(int, source_color)) if source_color is not None else None,
+        "rules": [[list(map(int, source)), list(map(int, target)), float(i), float(s)] for source, target, i, s in rules],
+        "space": space,
+        "profile": profile,
+        "suffix": suffix,
+    }
+    return hashlib.blake2b(json.dumps(normalized, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def output_matches(recorded, save_path):
+    requested = os.path.abspath(save_path)
+    if recorded == requested:
+        return True
+    stem, extension = os.path.splitext(recorded)
+    return stem == os.path.splitext(requested)[0] and extension in FALLBACK_EXTENSIONS
+
+
+def source_state(image_path):
+    stat = os.stat(image_path)
+    return {"digest": color_core.file_digest(image_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class RecolorManifest:
+    def __init__(self, path):
+        self.path = path
+        self.directory = os.path.dirname(os.path.abspath(path))
+        self.entries = {}
+        self.dirty = False
+        if os.path.isfile(path):
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("entries", {})
+
+    def lookup(self, image_path, key, save_path):
+        entry = self.entries.get(os.path.abspath(image_path))
+        if entry is None or entry["key"] != key:
+            return None
+        output = os.path.join(self.directory, entry["output"])
+        if not output_matches(output, save_path):
+            return None
+        try:
+            source = os.stat(image_path)
+            saved = os.stat(output)
+        except OSError:
+            return None
+        if saved.st_size != entry["output_size"]:
+            return None
+        if (source.st_size, source.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+            if source.st_size != entry["size"] or color_core.file_digest(image_path) != entry["digest"]:
+                return None
+            entry["mtime_ns"] = source.st_mtime_ns
+            self.dirty = True
+        return output
+
+    def record(self, image_path, save_path, key, state):
+        self.entries[os.path.abspath(image_path)] = {
+            "key": key,
+            "digest": state["digest"],
+            "size": state["size"],
+            "mtime_ns": state["mtime_ns"],
+            "output": os.path.relpath(os.path.abspath(save_path), self.directory),
+            "output_size": os.path.getsize(save_path),
+        }
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class ManifestSet:
+    def __init__(self, key):
+        self.key = key
+        self.manifests = {}
+
+    def manifest(self, save_path):
+        directory = os.path.dirname(os.path.abspath(save_path))
+        manifest = self.manifests.get(directory)
+        if manifest is None:
+            manifest = self.manifests[directory] = RecolorManifest(manifest_path(directory))
+        return manifest
+
+    def lookup(self, image_path, save_path):
+        return self.manifest(save_path).lookup(image_path, self.key, save_path)
+
+    def record(self, image_path, result):
+        self.manifest(result["save_path"]).record(image_path, result["save_path"], self.key, result["source_state"])
+
+    def save(self):
+        for manifest in self.manifests.values():
+            manifest.save()
@@ -0,0 +1,296 @@
+import io
+import os
+import time
+import zlib
+import struct
+from contextlib import contextmanager
+import numpy as np
+from PIL import Image
+import color_core
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+STRIP_PIXELS = color_core.CHUNK_PIXELS
+PNG_COMPRESS_LEVEL = 6
+READ_BLOCK = 1 << 20
+FILTER_BYTES = 1 << 20
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def read_chunks(f):
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        length, kind = struct.unpack(">I4s", header)
+        if kind == b"IDAT":
+            remaining = length
+            while remaining:
+                data = f.read(min(remaining, READ_BLOCK))
+                if not data:
+                    raise ValueError("Truncated PNG data")
+                remaining -= len(data)
+                yield kind, data
+        else:
+            yield kind, f.read(length)
+        f.read(4)
+        if kind == b"IEND":
+            return
+
+
+class PngStripReader:
+    def __init__(self, path, strip_rows):
+        self.path = path
+        self.strip_rows = max(1, strip_rows)
+        self.palette = None
+        self.transparency = None
+        with open(path, "rb") as f:
+            if f.read(8) != PNG_SIGNATURE:
+                raise ValueError("Not a PNG file")
+            for kind, data in read_chunks(f):
+                if kind == b"IHDR":
+                    self.header = data
+                    (self.width, self.height, self.bit_depth, self.color_type,
+                     _, _, self.interlace) = struct.unpack(">IIBBBBB", data)
+                elif kind == b"PLTE":
+                    self.palette = data
+                elif kind == b"tRNS":
+                    self.transparency = data
+                elif kind == b"IDAT":
+                    break
+        self.stride = self.width * PNG_CHANNELS.get(self.color_type, 0)
+
+    @classmethod
+    def supports(cls, path):
+        try:
+            reader = cls(path, 1)
+        except (OSError, ValueError, struct.error):
+            return False
+        return reader.bit_depth == 8 and reader.interlace == 0 and reader.color_type in PNG_CHANNELS
+
+    def decode(self, filtered, rows, previous):
+        header = struct.pack(">IIBBBBB", self.width, rows + 1, 8, self.color_type, 0, 0, 0)
+        parts = [PNG_SIGNATURE, png_chunk(b"IHDR", header)]
+        if self.palette is not None:
+            parts.append(png_chunk(b"PLTE", self.palette))
+        if self.transparency is not None:
+            parts.append(png_chunk(b"tRNS", self.transparency))
+        parts.append(png_chunk(b"IDAT", zlib.compress(b"\x00" + previous + filtered, 0)))
+        parts.append(png_chunk(b"IEND", b""))
+        with Image.open(io.BytesIO(b"".join(parts))) as strip:
+            strip.load()
+            previous = strip.crop((0, rows, self.width, rows + 1)).tobytes()
+            rgba = np.asarray(strip.crop((0, 1, self.width, rows + 1)).convert("RGBA"))
+        return rgba, previous
+
+    def __iter__(self):
+        row_bytes = self.stride + 1
+        strip_bytes = row_bytes * self.strip_rows
+        previous = bytes(self.stride)
+        decompressor = zlib.decompressobj()
+        pending = bytearray()
+        top = 0
+        with open(self.path, "rb") as f:
+            f.read(8)
+            for kind, data in read_chunks(f):
+                if kind != b"IDAT":
+                    continue
+                while data and top < self.height:
+                    pending += decompressor.decompress(data, strip_bytes)
+                    data = decompressor.unconsumed_tail
+                    while len(pending) >= strip_bytes and top < self.height:
+                        rows = min(self.strip_rows, self.height - top)
+                        rgba, previous = self.decode(bytes(pending[:rows * row_bytes]), rows, previous)
+                        del pending[:rows * row_bytes]
+                        yield top, rgba
+                        top += rows
+        pending += decompressor.flush()
+        while top < self.height:
+            rows = min(self.strip_rows, self.height - top)
+            if len(pending) < rows * row_bytes:
+                raise ValueError("Truncated PNG data")
+            rgba, previous = self.decode(bytes(pending[:rows * row_bytes]), rows, previous)
+            del pending[:rows * row_bytes]
+            yield top, rgba
+            top += rows
+
+
+class PngStripWriter:
+    def __init__(self, path, width, height, compress_level=PNG_COMPRESS_LEVEL):
+        self.width = width
+        self.height = height
+        self.written = 0
+        self.stride = width * 4
+        self.previous = np.zeros(self.stride, dtype=np.uint8)
+        self.compressor = zlib.compressobj(compress_level)
+        self.file = open(path, "wb")
+        self.file.write(PNG_SIGNATURE)
+        self.file.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        elif self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def filter_rows(self, rows):
+        raw = rows.astype(np.int16)
+        prior = np.empty_like(raw)
+        prior[0] = self.previous
+        prior[1:] = raw[:-1]
+        left = np.zeros_like(raw)
+        left[:, 4:] = raw[:, :-4]
+        upper_left = np.zeros_like(raw)
+        upper_left[:, 4:] = prior[:, :-4]
+
+        filtered = np.empty((len(rows), self.stride + 1), dtype=np.uint8)
+        best_cost = None
+        for kind in range(5):
+            if kind == 0:
+                predicted = 0
+            elif kind == 1:
+                predicted = left
+            elif kind == 2:
+                predicted = prior
+            elif kind == 3:
+                predicted = (left + prior) // 2
+            else:
+                estimate = left + prior - upper_left
+                dist_left = np.abs(estimate - left)
+                dist_up = np.abs(estimate - prior)
+                dist_upper_left = np.abs(estimate - upper_left)
+                predicted = np.where((dist_left <= dist_up) & (dist_left <= dist_upper_left), left,
+                                     np.where(dist_up <= dist_upper_left, prior, upper_left))
+            residual = (raw - predicted).astype(np.uint8)
+            cost = np.abs(residual.view(np.int8).astype(np.int16)).sum(axis=1, dtype=np.int64)
+            if best_cost is None:
+                better = np.ones(len(rows), dtype=bool)
+                best_cost = cost
+            else:
+                better = cost < best_cost
+                best_cost = np.where(better, cost, best_cost)
+            filtered[better, 0] = kind
+            filtered[better, 1:] = residual[better]
+        return filtered
+
+    def write(self, strip):
+        rows = np.ascontiguousarray(strip, dtype=np.uint8).reshape(-1, self.stride)
+        if len(rows) == 0:
+            return
+        batch = max(1, FILTER_BYTES // self.stride)
+        for start in range(0, len(rows), batch):
+            filtered = self.filter_rows(rows[start:start + batch])
+            self.previous = rows[min(len(rows), start + batch) - 1].copy()
+            data = self.compressor.compress(filtered.tobytes())
+            if data:
+                self.file.write(png_chunk(b"IDAT", data))
+        self.written += len(rows)
+
+    def close(self):
+        if self.file is None:
+            return
+        try:
+            if self.written != self.height:
+                raise ValueError(f"Expected {self.height} rows, got {self.written}")
+            self.file.write(png_chunk(b"IDAT", self.compressor.flush()))
+            self.file.write(png_chunk(b"IEND", b""))
+        finally:
+            self.file.close()
+            self.file = None
+
+
+def strip_rows_for(width, strip_pixels=STRIP_PIXELS):
+    return max(1, strip_pixels // max(1, width))
+
+
+@contextmanager
+def pixel_limit_lifted():
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        yield
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def iter_strips(path, strip_pixels=STRIP_PIXELS, image=None):
+    if image is None:
+        reader = PngStripReader(path, 1)
+        reader.strip_rows = strip_rows_for(reader.width, strip_pixels)
+        yield from reader
+        return
+    rows = strip_rows_for(image.width, strip_pixels)
+    for top in range(0, image.height, rows):
+        box = (0, top, image.width, min(image.height, top + rows))
+        yield top, np.asarray(image.crop(box).convert("RGBA"))
+
+
+def image_size(path):
+    if PngStripReader.supports(path):
+        reader = PngStripReader(path, 1)
+        return reader.width, reader.height
+    with pixel_limit_lifted(), Image.open(path) as image:
+        return image.size
+
+
+def sample_pixels(path, strip_pixels=STRIP_PIXELS, image=None):
+    width, height = image.size if image is not None else image_size(path)
+    step = color_core.sample_step(width * height)
+    samples = []
+    for top, strip in iter_strips(path, strip_pixels, image):
+        offset = top * width
+        first = -offset % step
+        samples.append(strip.reshape(-1, 4)[first::step].copy())
+    return np.concatenate(samples) if samples else np.empty((0, 4), dtype=np.uint8)
+
+
+def recolor_file_tiled(image_path, save_path, target_color, intensity, sensitivity, source_color=None, rules=(),
+                       use_lut=False, lut_dir=color_core.LUT_DIR, space="rgb", strip_pixels=STRIP_PIXELS,
+                       profile=color_core.DEFAULT_PROFILE, digest=None):
+    started = time.perf_counter()
+    image = None
+    if not PngStripReader.supports(image_path):
+        # Only 8-bit non-interlaced PNG is decoded in bounded memory. Other formats are decoded
+        # once in full and then sliced into strips, so their peak grows with the image size.
+        with pixel_limit_lifted():
+            image = Image.open(image_path)
+            image.load()
+    try:
+        return recolor_strips(image_path, image, save_path, target_color, intensity, sensitivity, source_color, rules,
+                              use_lut, lut_dir, space, strip_pixels, profile, started, digest)
+    finally:
+        if image is not None:
+            image.close()
+
+
+def recolor_strips(image_path, image, save_path, target_color, intensity, sensitivity, source_color, rules,
+                   use_lut, lut_dir, space, strip_pixels, profile, started, digest=None):
+    fixed_source = source_color is not None
+    if source_color is None:
+        source_color = color_core.get_dominant_color(image_path, sampler=lambda: sample_pixels(image_path, strip_pixels, image),
+                                                     digest=digest)
+    all_rules = list(rules) + [(source_color, target_color, intensity, sensitivity)]
+    lut = color_core.load_lut(all_rules, lut_dir, space) if use_lut and fixed_source else None
+
+    spec = color_core.OUTPUT_PROFILES[profile]
+    compress_level = spec["options"].get("compress_level", PNG_COMPRESS_LEVEL) if spec["format"] == "PNG" else PNG_COMPRESS_LEVEL
+    save_path = os.path.splitext(save_path)[0] + ".png"
+    width, height = image.size if image is not None else image_size(image_path)
+    os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+    with PngStripWriter(save_path, width, height, compress_level) as writer:
+        for _, strip in iter_strips(image_path, strip_pixels, image):
+            strip = np.array(strip)
+            if lut is not None:
+                color_core.apply_lut_array(strip, lut)
+            else:
+                color_core.recolor_rules(strip, all_rules, space=space)
+            writer.write(strip)
+    return {"path": image_path, "save_path": save_path, "source_color": tuple(source_color),
+            "seconds": time.perf_counter() - started}
@@ -0,0 +1,239 @@
+import time
+import asyncio
+import bisect
+import multiprocessing
+
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000]
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class ThrottledError(Exception):
+    pass
+
+
+def is_throttle_error(e):
+    if isinstance(e, (asyncio.TimeoutError, ThrottledError)):
+        return True
+    response = getattr(e, "response", None)
+    if getattr(response, "status_code", None) == 429 or getattr(e, "status_code", None) == 429:
+        return True
+    message = str(e).lower()
+    return "429" in message or "too many requests" in message or "timed out" in message
+
+
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self, translator=None):
+        if translator is None:
+            from googletrans import Translator
+            translator = Translator()
+        self.translator = translator
+
+    async def translate(self, texts, src_lang, dest_lang):
+        result = await self.translator.translate(list(texts), src=src_lang, dest=dest_lang)
+        if not isinstance(result, list):
+            result = [result]
+        return [t.text for t in result]
+
+
+class CallableBackend:
+    def __init__(self, func, name=None):
+        self.func = func
+        self.name = name or getattr(func, "__name__", "callable")
+
+    async def translate(self, texts, src_lang, dest_lang):
+        result = await self.func(list(texts), src_lang, dest_lang)
+        return [result] if isinstance(result, str) else list(result)
+
+
+class OfflineBackend:
+    name = "offline"
+
+    def __init__(self, latency=0.0, fail_every=0, throttle_every=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.throttle_every = throttle_every
+        self.calls = 0
+
+    async def translate(self, texts, src_lang, dest_lang):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.throttle_every and self.calls % self.throttle_every == 0:
+            raise ThrottledError("429 Too Many Requests")
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise RuntimeError("offline backend failure")
+        return [f"[{dest_lang}] {text}" for text in texts]
+
+
+BACKENDS = {"google": GoogleBackend, "offline": OfflineBackend}
+
+
+def make_backend(spec=None):
+    if spec is None:
+        return GoogleBackend()
+    if isinstance(spec, str):
+        return BACKENDS[spec]()
+    if isinstance(spec, ManagedBackend):
+        return spec.backend
+    if type(spec).__module__.split(".")[0] == "googletrans":
+        return GoogleBackend(spec)
+    if hasattr(spec, "translate"):
+        return spec
+    if callable(spec):
+        return CallableBackend(spec)
+    raise TypeError(f"Unsupported translation backend: {spec!r}")
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate, min_rate=None, max_rate=None, burst=1, increase=None,
+                 decrease=0.5, cooldown=5.0):
+        self.max_rate = max(max_rate or rate, rate)
+        self.min_rate = min_rate or rate / 20
+        self.burst = burst
+        self.increase = increase or self.max_rate / 50
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.lock = multiprocessing.Lock()
+        self.rate = multiprocessing.Value("d", rate, lock=False)
+        self.tat = multiprocessing.Value("d", 0.0, lock=False)
+        self.blocked_until = multiprocessing.Value("d", 0.0, lock=False)
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            interval = 1.0 / self.rate.value
+            earliest = max(now, self.blocked_until.value)
+            tat = max(self.tat.value, earliest)
+            slot = max(earliest, tat - (self.burst - 1) * interval)
+            self.tat.value = tat + interval
+        return slot - now
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self):
+        with self.lock:
+            self.rate.value = min(self.max_rate, self.rate.value + self.increase)
+
+    def on_throttle(self):
+        with self.lock:
+            self.rate.value = max(self.min_rate, self.rate.value * self.decrease)
+            self.blocked_until.value = max(self.blocked_until.value, time.monotonic() + self.cooldown)
+
+    @property
+    def current_rate(self):
+        return self.rate.value
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def check(self):
+        if self.state == "open":
+            raise CircuitOpenError(f"circuit open after {self.failures} consecutive failures")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        state = self.state
+        self.failures += 1
+        if state == "half-open" or (state == "closed" and self.failures >= self.failure_threshold):
+            self.trips += 1
+            self.opened_at = time.monotonic()
+
+
+class LatencyHistogram:
+    def __init__(self, bounds_ms=HISTOGRAM_BOUNDS_MS):
+        self.bounds_ms = list(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+        return self
+
+    def percentile(self, p):
+        if not self.total:
+            return 0.0
+        rank = p / 100.0 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds_ms[i] if i < len(self.bounds_ms) else float("inf")
+        return float("inf")
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "mean_ms": self.sum_ms / self.total if self.total else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
+
+
+class ManagedBackend:
+    def __init__(self, backend, rate_limiter=None, breaker=None):
+        self.backend = backend
+        self.name = getattr(backend, "name", type(backend).__name__)
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.histogram = LatencyHistogram()
+        self.calls = 0
+        self.throttled = 0
+
+    async def translate(self, texts, src_lang, dest_lang, timeout=None):
+        self.breaker.check()
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self.backend.translate(texts, src_lang, dest_lang), timeout)
+            if len(result) != len(texts):
+                raise ValueError(f"expected {len(texts)} translations, got {len(result)}")
+        except Exception as e:
+            self.breaker.record_failure()
+            if is_throttle_error(e):
+                self.throttled += 1
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_throttle()
+            raise
+        finally:
+            self.histogram.record(time.perf_counter() - started)
+        self.breaker.record_success()
+        if self.rate_limiter is not None:
+            self.rate_limiter.on_success()
+        return result
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".excel_translate_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 500000
+QUERY_CHUNK = 500
+
+
+class TranslationCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or ":memory:"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "text TEXT NOT NULL, src TEXT NOT NULL, dest TEXT NOT NULL, "
+            "translation TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (text, src, dest))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def get(self, text, src, dest):
+        return self.get_many([text], src, dest).get(text)
+
+    def get_many(self, texts, src, dest):
+        found = {}
+        texts = list(dict.fromkeys(texts))
+        for start in range(0, len(texts), QUERY_CHUNK):
+            chunk = texts[start:start + QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT text, translation FROM translations WHERE src = ? AND dest = ? AND text IN ({placeholders})",
+                [src, dest, *chunk],
+            ).fetchall()
+            found.update(rows)
+        if found:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE translations SET last_used = ? WHERE text = ? AND src = ? AND dest = ?",
+                [(now, text, src, dest) for text in found],
+            )
+            self.conn.commit()
+        self.hits += len(found)
+        self.misses += len(texts) - len(found)
+        return found
+
+    def put(self, text, src, dest, translation):
+        self.put_many({text: translation}, src, dest)
+
+    def put_many(self, translations, src, dest):
+        if not translations:
+            return
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO translations (text, src, dest, translation, last_used) VALUES (?, ?, ?, ?, ?)",
+            [(text, src, dest, translation, now) for text, translation in translations.items()],
+        )
+        self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        if not self.max_entries:
+            return 0
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM translations WHERE rowid IN "
+            "(SELECT rowid FROM translations ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        self.conn.commit()
+        self.evictions += excess
+        return excess
+
+    def clear(self):
+        self.conn.execute("DELETE FROM translations")
+        self.conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        self.conn.close()
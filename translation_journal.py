@@ -0,0 +1,89 @@
+import os
+import json
+import time
+
+CHECKPOINT_EVERY = 200
+CHECKPOINT_INTERVAL = 5.0
+
+
+def journal_path(save_path):
+    return f"{save_path}.journal"
+
+
+class TranslationJournal:
+    def __init__(self, path, excel_path, src_lang, dest_lang, resume=False,
+                 checkpoint_every=CHECKPOINT_EVERY, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.header = {"input": os.path.abspath(excel_path), "src": src_lang, "dest": dest_lang}
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.translations = {}
+        self.resumed = False
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        if resume and os.path.isfile(path):
+            self.resumed = self.load()
+        if not self.resumed:
+            self.translations = {}
+        self.rewrite()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return False
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return False
+        if header != self.header:
+            return False
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self.translations[entry["source"]] = entry["text"]
+        return True
+
+    def rewrite(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.header, ensure_ascii=False) + "\n")
+            for source, text in self.translations.items():
+                f.write(json.dumps({"source": source, "text": text}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def record(self, translations):
+        for source, text in translations.items():
+            self.translations[source] = text
+            self.buffer.append(json.dumps({"source": source, "text": text}, ensure_ascii=False))
+        if len(self.buffer) >= self.checkpoint_every or time.monotonic() - self.last_flush >= self.checkpoint_interval:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.buffer = []
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
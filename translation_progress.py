@@ -0,0 +1,99 @@
+import sys
+import json
+import time
+
+BAR_INTERVAL = 0.2
+LOG_INTERVAL = 10.0
+BAR_WIDTH = 30
+COUNTERS = ("scanned", "skipped_formula", "skipped_non_string", "translated", "failed")
+
+
+class TranslationMetrics:
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.last_error = None
+
+    def add(self, name, n=1):
+        self.counts[name] += n
+
+    def merge(self, other):
+        for name, n in other.items():
+            self.counts[name] = self.counts.get(name, 0) + n
+        return self
+
+    def __getitem__(self, name):
+        return self.counts[name]
+
+
+class ProgressReporter:
+    def __init__(self, label="", mode="auto", stream=None, events_path=None, interval=None):
+        self.label = label
+        self.stream = stream or sys.stderr
+        if mode == "auto":
+            mode = "bar" if getattr(self.stream, "isatty", lambda: False)() else "log"
+        self.mode = mode
+        self.interval = interval if interval is not None else (BAR_INTERVAL if mode == "bar" else LOG_INTERVAL)
+        self.metrics = TranslationMetrics()
+        self.total = None
+        self.started = time.perf_counter()
+        self.last_render = self.started
+        self.events = open(events_path, "a", encoding="utf-8") if events_path else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def set_total(self, total):
+        self.total = total
+
+    def add(self, name, n=1):
+        self.metrics.add(name, n)
+        now = time.perf_counter()
+        if now - self.last_render >= self.interval:
+            self.last_render = now
+            self.render()
+
+    def failure(self, location, error):
+        self.metrics.last_error = f"{location}: {error}"
+        self.event("failed", cell=location, error=str(error))
+        self.add("failed")
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.metrics["translated"] / elapsed if elapsed > 0 else 0.0
+
+    def render(self, final=False):
+        done = self.metrics["translated"] + self.metrics["failed"]
+        rate = self.rate()
+        if self.mode == "bar":
+            if self.total:
+                filled = int(BAR_WIDTH * min(done / self.total, 1.0))
+                bar = "#" * filled + "-" * (BAR_WIDTH - filled)
+                line = f"\r{self.label} [{bar}] {done}/{self.total} cells {rate:.1f} cells/s, {self.metrics['failed']} failed"
+            else:
+                line = f"\r{self.label} {done} cells {rate:.1f} cells/s, {self.metrics['failed']} failed"
+            self.stream.write(line + ("\n" if final else ""))
+        elif self.mode == "log":
+            total = f"/{self.total}" if self.total else ""
+            self.stream.write(f"{self.label}: {done}{total} cells, {rate:.1f} cells/s, {self.metrics['failed']} failed\n")
+        if self.mode != "off":
+            self.stream.flush()
+        self.event("progress", rate=rate, **self.metrics.counts)
+
+    def event(self, name, **fields):
+        if self.events is None:
+            return
+        record = {"ts": time.time(), "event": name, "file": self.label, **fields}
+        self.events.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.events.flush()
+
+    def close(self):
+        self.render(final=True)
+        if self.metrics.last_error and self.mode != "off":
+            self.stream.write(f"{self.label}: {self.metrics['failed']} cells could not be translated, last error: {self.metrics.last_error}\n")
+        if self.events is not None:
+            self.event("done", seconds=time.perf_counter() - self.started, **self.metrics.counts)
+            self.events.close()
+            self.events = None